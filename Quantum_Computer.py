@@ -1,33 +1,81 @@
 #20212426 정채호준 제작
 #구동 시 tkinter, numpy, matplotlib라이브러리 필요
 #[양자 컴퓨터 시뮬레이터] - 고전적 컴퓨터와 양자 컴퓨터를 비교하는 교육용 소프트웨어
+import time
+START_TIME = time.perf_counter()  # 시작 시간 측정 기준 (--timing 보고용, 다른 모듈을 가져오기 전에 잼)
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import sys
 import math
-import time
+import queue
 import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import numpy as np
 
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+# 시뮬레이션 엔진 (GUI 없이 쓸 수 있는 quantum_core 모듈)
+from quantum_core import (PRECISIONS, X_GATE, H_GATE, CNOT_GATE, StateVector, ReducedGroverSearch,
+                          optimal_grover_iterations, pauli_expectations, read_qasm, write_qasm, RESULT_CACHE,
+                          run_cached, GateHistory, CHECKPOINT_INTERVAL, Job, JobCancelled,
+                          histogram_job, grover_history_job, grover_distribution_job, parallel_search_job)
+
+
+# 복잡도 그래프에서 직접 입력할 수 있는 최대 N
+MAX_GRAPH_N = 2 ** 64
+
+# 복잡도 그래프 설정
+GRAPH_SLIDER_MAX_N = 10 ** 9  # 슬라이더(로그 눈금)의 최대 N
+GRAPH_POINTS = 200  # N이 이보다 크면 로그 간격으로 이만큼의 지점만 계산
+GRAPH_DEBOUNCE_MS = 40  # 슬라이더를 움직이는 동안 마지막 값만 그리도록 기다리는 시간
+
+
+# value 이상인 가장 작은 1-2-5 눈금 값 (축 범위가 슬라이더 틱마다 바뀌지 않도록 계단식으로 키움)
+def nice_limit(value):
+    base = 10.0 ** math.floor(math.log10(value))
+    for step in (1, 2, 5):
+        if step * base >= value:
+            return step * base
+    return 10 * base
+
+
+# 확률(0~1)을 연한 파랑 -> 초록 색상 문자열로 변환
+def probability_color(prob):
+    t = min(max(prob, 0.0), 1.0)
+    low, high = (0xd0, 0xd0, 0xff), (0x00, 0xc0, 0x00)
+    r, g, b = (round(lo + (hi - lo) * t) for lo, hi in zip(low, high))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+# 게이트 시뮬레이터에서 한 번에 측정하는 횟수
+MEASURE_SHOTS = 1000
+
+# 게이트 시뮬레이터에 기댓값을 표시할 파울리 문자열
+DISPLAY_PAULIS = ("ZI", "IZ", "ZZ", "XX")
+
+# 회로 위에 표시할 수 있는 게이트 (게이트 이름 -> add_gate 종류)
+GATE_LABELS = {"x": "X", "h": "H", "cnot": "CNOT"}
+
 
 # 게이트 시뮬레이터 클래스 정의
 class GateSimulator:
-    def __init__(self, master):
+    def __init__(self, master, precision="complex128", runner=None, checkpoint_interval=CHECKPOINT_INTERVAL,
+                 on_close=None):
         self.master = master
-        self.master.title("양자 게이트 시뮬레이터")
+        self.on_close = on_close  # 창을 닫을 때 이 시뮬레이터를 인자로 호출 (App의 목록에서 빼기용)
+        self.master.title(f"양자 게이트 시뮬레이터 ({precision})")
 
-        # 초기 큐비트 상태 정의
-        self.state = np.array([1, 0])  # 단일 큐비트 |0>
-        self.state_cnot = np.array([1, 0, 0, 0])  # 두 큐비트 상태 |00>
+        # 초기 큐비트 상태 정의: 두 큐비트 상태 벡터 엔진 |00>
+        # 큐비트 0 = Qubit 1 (X, H 게이트 대상 및 CNOT 제어), 큐비트 1 = Qubit 2 (CNOT 대상)
+        self.precision = precision
+        self.engine = StateVector(2, dtype=PRECISIONS[precision])
+        self.history = GateHistory(self.engine, checkpoint_interval)  # 적용한 게이트 기록 (되돌리기/다시 실행)
+        self.runner = runner if runner is not None else JobRunner(master)  # 측정 등 백그라운드 작업 실행기 (창마다 따로)
+        self.measure_job = None
 
         # 게이트 정의
-        self.X_gate = np.array([[0, 1], [1, 0]])  # Pauli-X 게이트
-        self.H_gate = (1 / np.sqrt(2)) * np.array([[1, 1], [1, -1]])  # Hadamard 게이트
-        self.CNOT_gate = np.array([[1, 0, 0, 0],
-                                   [0, 1, 0, 0],
-                                   [0, 0, 0, 1],
-                                   [0, 0, 1, 0]])  # CNOT 게이트
+        self.X_gate = X_GATE  # Pauli-X 게이트
+        self.H_gate = H_GATE  # Hadamard 게이트
+        self.CNOT_gate = CNOT_GATE  # CNOT 게이트
 
         # 상태 표시 캔버스
         self.canvas = tk.Canvas(self.master, width=800, height=400, bg="white")
@@ -51,6 +99,26 @@ class GateSimulator:
         self.qubit2_circle = self.canvas.create_oval(150, 140, 180, 170, fill="blue")
         self.qubit2_text = self.canvas.create_text(165, 155, text="|00>", font=("Arial", 14))
 
+        # 큐비트별 블로흐 벡터 표시 (선 오른쪽 끝의 원: 가로 = x, 세로 = z, 화살표 길이 = 벡터 길이)
+        self.bloch_arrows = []
+        self.bloch_texts = []
+        for y in (50, 150):
+            self.canvas.create_oval(730, y - 25, 780, y + 25, outline="gray")
+            self.bloch_arrows.append(self.canvas.create_line(755, y, 755, y - 25, width=2, arrow=tk.LAST, fill="red"))
+            self.bloch_texts.append(self.canvas.create_text(755, y + 38, text="", font=("Arial", 9)))
+
+        # 측정 결과 표시
+        self.measure_text = self.canvas.create_text(400, 300, text="", font=("Arial", 12))
+
+        # 파울리 기댓값 표시
+        self.expectation_text = self.canvas.create_text(400, 240, text="", font=("Arial", 12))
+
+        # 기록 위치 표시
+        self.history_text = self.canvas.create_text(10, 390, text="", anchor="sw", font=("Arial", 10))
+
+        # 정밀도 및 노름 오차 표시
+        self.precision_text = self.canvas.create_text(790, 390, text="", anchor="se", font=("Arial", 10))
+
         # 버튼 추가
         btn_frame = tk.Frame(self.master)
         btn_frame.pack(pady=10)
@@ -64,42 +132,86 @@ class GateSimulator:
         btn_cnot = tk.Button(btn_frame, text="Apply CNOT Gate", command=self.apply_cnot_gate)
         btn_cnot.pack(side=tk.LEFT, padx=5)
 
+        btn_measure = tk.Button(btn_frame, text=f"Measure ({MEASURE_SHOTS} shots)", command=self.measure)
+        btn_measure.pack(side=tk.LEFT, padx=5)
+
+        btn_undo = tk.Button(btn_frame, text="Undo", command=self.undo)
+        btn_undo.pack(side=tk.LEFT, padx=5)
+
+        btn_redo = tk.Button(btn_frame, text="Redo", command=self.redo)
+        btn_redo.pack(side=tk.LEFT, padx=5)
+
         btn_reset = tk.Button(btn_frame, text="Reset", command=self.reset)
         btn_reset.pack(side=tk.LEFT, padx=5)
 
+        # 회로 저장/불러오기 (OpenQASM 2.0)
+        btn_save = tk.Button(btn_frame, text="Save QASM", command=self.save_qasm)
+        btn_save.pack(side=tk.LEFT, padx=5)
+
+        btn_load = tk.Button(btn_frame, text="Load QASM", command=self.load_qasm)
+        btn_load.pack(side=tk.LEFT, padx=5)
+
+        # 창을 닫으면 실행 중인 측정 작업도 멈춤
+        self.master.protocol("WM_DELETE_WINDOW", self.close)
+
+        # 단축키: Ctrl+Z 되돌리기, Ctrl+Y 다시 실행
+        self.master.bind("<Control-z>", lambda event: self.undo())
+        self.master.bind("<Control-y>", lambda event: self.redo())
+
         # 초기 상태 업데이트
         self.update_visual_state()
 
     # 상태 업데이트 함수
     def update_visual_state(self):
-        # 첫 번째 큐비트 상태 표시
-        if np.array_equal(self.state, [1, 0]):
+        bloch = self.engine.bloch_vectors()
+
+        # 첫 번째 큐비트 상태 표시 (블로흐 벡터가 짧으면 다른 큐비트와 얽힌 상태)
+        p1 = (1 - bloch[0, 2]) / 2
+        if p1 <= self.engine.tolerance:
             self.canvas.itemconfig(self.qubit1_circle, fill="blue")
             self.canvas.itemconfig(self.qubit1_text, text="|0>")
-        elif np.array_equal(self.state, [0, 1]):
+        elif p1 >= 1 - self.engine.tolerance:
             self.canvas.itemconfig(self.qubit1_circle, fill="red")
             self.canvas.itemconfig(self.qubit1_text, text="|1>")
+        elif np.linalg.norm(bloch[0]) < 1 - self.engine.tolerance:
+            self.canvas.itemconfig(self.qubit1_circle, fill="gray")
+            self.canvas.itemconfig(self.qubit1_text, text="Entangled")
         else:
             self.canvas.itemconfig(self.qubit1_circle, fill="purple")
             self.canvas.itemconfig(self.qubit1_text, text="Superposition")
 
-        # 두 번째 큐비트 상태 표시
-        if np.array_equal(self.state_cnot, [1, 0, 0, 0]):
-            self.canvas.itemconfig(self.qubit2_circle, fill="blue")
-            self.canvas.itemconfig(self.qubit2_text, text="|00>")
-        elif np.array_equal(self.state_cnot, [0, 1, 0, 0]):
-            self.canvas.itemconfig(self.qubit2_circle, fill="green")
-            self.canvas.itemconfig(self.qubit2_text, text="|01>")
-        elif np.array_equal(self.state_cnot, [0, 0, 1, 0]):
-            self.canvas.itemconfig(self.qubit2_circle, fill="orange")
-            self.canvas.itemconfig(self.qubit2_text, text="|10>")
-        elif np.array_equal(self.state_cnot, [0, 0, 0, 1]):
-            self.canvas.itemconfig(self.qubit2_circle, fill="red")
-            self.canvas.itemconfig(self.qubit2_text, text="|11>")
+        # 큐비트별 블로흐 벡터 표시
+        for q, (x, y, z) in enumerate(bloch):
+            cy = 50 + 100 * q
+            self.canvas.coords(self.bloch_arrows[q], 755, cy, 755 + 25 * x, cy - 25 * z)
+            self.canvas.itemconfig(self.bloch_arrows[q], fill=probability_color(1 - math.hypot(x, y, z)))
+            self.canvas.itemconfig(self.bloch_texts[q], text=f"({x:+.2f}, {y:+.2f}, {z:+.2f})")
+
+        # 두 큐비트 전체 상태 표시
+        colors = ["blue", "green", "orange", "red"]  # |00>, |01>, |10>, |11>
+        index = self.engine.basis_index()
+        if index is not None:
+            self.canvas.itemconfig(self.qubit2_circle, fill=colors[index])
+            self.canvas.itemconfig(self.qubit2_text, text=self.engine.label(index))
+        else:
+            self.canvas.itemconfig(self.qubit2_circle, fill="purple")
+            self.canvas.itemconfig(self.qubit2_text, text="Superposition")
 
-    # 게이트 추가 함수
-    def add_gate(self, gate_type):
-        # 모든 기존 게이트를 지움
+        # 파울리 기댓값 표시
+        values = pauli_expectations(self.engine, DISPLAY_PAULIS)
+        text = "   ".join(f"<{p}> = {v:+.3f}" for p, v in zip(DISPLAY_PAULIS, values))
+        self.canvas.itemconfig(self.expectation_text, text=text)
+
+        # 기록 위치 표시 (적용한 게이트 수 / 기록된 게이트 수)
+        self.canvas.itemconfig(self.history_text, text=f"게이트 기록: {self.history.position}/{len(self.history)}")
+
+        # 누적 노름 오차 표시
+        drift = self.engine.norm_drift()
+        self.canvas.itemconfig(self.precision_text,
+                               text=f"정밀도: {self.precision} / 노름 오차: {drift:.1e} (최대 {self.engine.max_norm_drift:.1e})")
+
+    # 회로 위의 게이트 표시를 모두 지움
+    def clear_gate_visuals(self):
         for gate in self.gate_visuals:
             self.canvas.delete(gate)
         for text in self.gate_texts:
@@ -107,6 +219,11 @@ class GateSimulator:
         self.gate_visuals.clear()
         self.gate_texts.clear()
 
+    # 게이트 추가 함수
+    def add_gate(self, gate_type):
+        # 모든 기존 게이트를 지움
+        self.clear_gate_visuals()
+
         # 새로운 게이트 추가
         if gate_type == "X":
             gate = self.canvas.create_rectangle(200, 30, 250, 70, fill="lightblue")
@@ -124,91 +241,469 @@ class GateSimulator:
         self.gate_visuals.append(gate)
         self.gate_texts.append(text)
 
+    # 게이트를 기록하고 엔진에 바로 적용
+    def apply_recorded_gate(self, gate):
+        self.history.apply(gate)
+        self.update_visual_state()
+
+    # 마지막으로 적용된 게이트를 회로 위에 표시 (X, H, CNOT 외의 게이트는 표시하지 않음)
+    def show_last_gate(self):
+        applied = self.history.applied()
+        gate_type = GATE_LABELS.get(applied[-1][0]) if applied else None
+        if gate_type is None:
+            self.clear_gate_visuals()
+        else:
+            self.add_gate(gate_type)
+
+    # 측정 결과는 이전 상태의 것이므로 지움
+    def clear_measurement(self):
+        if self.measure_job is not None:
+            self.measure_job.cancel()
+        self.canvas.itemconfig(self.measure_text, text="")
+
+    # 마지막 게이트를 역게이트로 되돌림
+    def undo(self):
+        if self.history.undo():
+            self.clear_measurement()
+            self.show_last_gate()
+            self.update_visual_state()
+
+    # 되돌린 게이트를 다시 적용
+    def redo(self):
+        if self.history.redo():
+            self.clear_measurement()
+            self.show_last_gate()
+            self.update_visual_state()
+
     # X 게이트 적용 함수
     def apply_x_gate(self):
         self.add_gate("X")
-        self.state = np.dot(self.X_gate, self.state)
-        self.update_visual_state()
+        self.apply_recorded_gate(("x", 0))
 
     # H 게이트 적용 함수
     def apply_h_gate(self):
         self.add_gate("H")
-        self.state = np.dot(self.H_gate, self.state)
-        self.update_visual_state()
+        self.apply_recorded_gate(("h", 0))
 
-    # CNOT 게이트 적용 함수 (수정된 부분)
+    # CNOT 게이트 적용 함수: 첫 번째 큐비트가 |1>인 성분에서 두 번째 큐비트를 반전
     def apply_cnot_gate(self):
         self.add_gate("CNOT")
-
-        # 첫 번째 큐비트가 |1>인 경우 두 번째 큐비트를 반전
-        # 상태_cnot는 |00>, |01>, |10>, |11> 중 하나로 가정
-        if np.array_equal(self.state, [0, 1]):  # 제어 큐비트가 |1>
-            if np.array_equal(self.state_cnot, [1, 0, 0, 0]):  # |00>
-                self.state_cnot = np.array([0, 0, 1, 0])  # → |10>
-            elif np.array_equal(self.state_cnot, [0, 1, 0, 0]):  # |01>
-                self.state_cnot = np.array([0, 0, 0, 1])  # → |11>
-            elif np.array_equal(self.state_cnot, [0, 0, 1, 0]):  # |10>
-                self.state_cnot = np.array([0, 0, 0, 1])  # → |11>
-            elif np.array_equal(self.state_cnot, [0, 0, 0, 1]):  # |11>
-                self.state_cnot = np.array([0, 0, 1, 0])  # → |10>
-        # 만약 제어 큐비트가 |0>이라면 대상 큐비트는 변화 없음
+        self.apply_recorded_gate(("cnot", 0, 1))
+
+    # 측정 함수: 현재 상태를 여러 번 측정한 결과 분포 표시 (상태는 유지)
+    # 측정은 확률 분포의 복사본으로 백그라운드에서 수행하며, 진행 중에는 누적 결과를 표시
+    def measure(self):
+        if self.measure_job is not None:
+            self.measure_job.cancel()
+
+        def show(counts, progress=None):
+            text = "   ".join(f"{self.engine.label(i)}: {counts[i]}" for i in np.flatnonzero(counts))
+            title = f"측정 중 {progress:.0%}" if progress is not None else "측정 결과"
+            self.canvas.itemconfig(self.measure_text, text=f"{title} ({MEASURE_SHOTS}회)\n{text}")
+
+        self.measure_job = self.runner.submit(histogram_job, self.engine.probabilities().copy(), MEASURE_SHOTS,
+                                              on_progress=lambda fraction, counts: show(counts, fraction),
+                                              on_done=show)
+
+    # 지금까지 적용한 게이트를 OpenQASM 2.0 파일로 저장 (끝에 모든 큐비트 측정)
+    def save_qasm(self):
+        path = filedialog.asksaveasfilename(parent=self.master, defaultextension=".qasm",
+                                            filetypes=[("OpenQASM", "*.qasm"), ("모든 파일", "*.*")])
+        if path:
+            write_qasm(self.history.applied(), path, num_qubits=2, measure=True)
+
+    # 두 큐비트 QASM 파일을 불러와 처음부터 다시 실행
+    def load_qasm(self):
+        path = filedialog.askopenfilename(parent=self.master,
+                                          filetypes=[("OpenQASM", "*.qasm"), ("모든 파일", "*.*")])
+        if not path:
+            return
+        try:
+            circuit, _ = read_qasm(path)
+            if circuit.num_qubits != 2:
+                raise ValueError(f"큐비트가 2개인 회로만 불러올 수 있습니다 (파일: {circuit.num_qubits}개)")
+        except (OSError, ValueError) as error:
+            messagebox.showerror("불러오기 오류", str(error), parent=self.master)
+            return
+        self.reset()
+        self.history.extend(circuit.gates, run=lambda state, gates: run_cached(state, gates, compile=False))
+        self.show_last_gate()
         self.update_visual_state()
 
+    def close(self):
+        self.runner.shutdown()
+        if self.on_close is not None:
+            self.on_close(self)
+        self.master.destroy()
+
     # 초기화 함수
     def reset(self):
-        self.state = np.array([1, 0])
-        self.state_cnot = np.array([1, 0, 0, 0])
-        for gate in self.gate_visuals:
-            self.canvas.delete(gate)
-        for text in self.gate_texts:
-            self.canvas.delete(text)
-        self.gate_visuals.clear()
-        self.gate_texts.clear()
+        self.clear_measurement()
+        self.history.reset()
+        self.clear_gate_visuals()
         self.update_visual_state()
 
 
+# 애니메이션 한 번의 틱에서 캔버스 갱신에 쓸 수 있는 최대 시간 (ms) - 넘으면 나머지는 다음 틱으로 미룸
+ANIMATION_FRAME_BUDGET_MS = 15
+
+# 애니메이션 배속 단계 (빠르게 버튼을 누를 때마다 다음 단계로)
+ANIMATION_SPEEDS = (1, 2, 4, 8)
+
+# 애니메이션 한 단계의 최대 프레임 수 (항목이 많으면 한 프레임에 여러 칸을 함께 진행)
+ANIMATION_MAX_FRAMES = 2000
+
+
+# root.after 기반 애니메이션 재생기 정의
+# 미리 계산한 프레임 목록 [(갱신 목록, 유지 시간 ms), ...]을 Tk 이벤트 루프를 막지 않고 차례로 재생
+# 갱신은 인자 없는 함수 (GridRenderer.fill/flush 등을 partial로 묶은 것)
+# 한 틱에 ANIMATION_FRAME_BUDGET_MS를 넘게 쓰지 않으며, 일시정지/계속, 배속, 취소를 지원
+class Animation:
+    def __init__(self, widget, frames, on_done=None, frame_budget_ms=ANIMATION_FRAME_BUDGET_MS):
+        self.widget = widget
+        self.frames = frames
+        self.on_done = on_done
+        self.frame_budget = frame_budget_ms / 1000
+        self.speed = 1
+        self.paused = False
+        self.cancelled = False
+        self.finished = False
+        self.position = 0  # 다음에 재생할 프레임 번호
+        self._pending = []  # 현재 프레임에서 아직 적용하지 못한 갱신
+        self._hold = 0
+        self._job = None
+
+    def start(self):
+        self._schedule(0)
+        return self
+
+    @property
+    def running(self):
+        return not (self.finished or self.cancelled)
+
+    def _schedule(self, delay_ms):
+        self._job = self.widget.after(max(1, int(delay_ms / self.speed)), self._tick)
+
+    def _tick(self):
+        self._job = None
+        if not self.running or self.paused:
+            return
+        deadline = time.perf_counter() + self.frame_budget
+        if not self._pending:
+            ops, self._hold = self.frames[self.position]
+            self._pending = list(ops)[::-1]
+            self.position += 1
+        while self._pending and time.perf_counter() < deadline:
+            self._pending.pop()()
+        if self._pending:
+            self._schedule(0)  # 예산 초과: 같은 프레임을 다음 틱에 이어서 적용
+        elif self.position >= len(self.frames):
+            self.finished = True
+            if self.on_done is not None:
+                self.on_done()
+        else:
+            self._schedule(self._hold)
+
+    def pause(self):
+        self.paused = True
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def resume(self):
+        if self.paused and self.running:
+            self.paused = False
+            self._schedule(0)
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    # 다음 배속 단계로 변경 (마지막 단계 다음은 1배속)
+    def speed_up(self):
+        self.speed = ANIMATION_SPEEDS[(ANIMATION_SPEEDS.index(self.speed) + 1) % len(ANIMATION_SPEEDS)] \
+            if self.speed in ANIMATION_SPEEDS else 1
+        return self.speed
+
+    def cancel(self):
+        self.cancelled = True
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+
+# 작업 큐를 확인하는 주기 (ms)
+JOB_POLL_MS = 50
+
+
+# Tk 스레드 밖에서 시뮬레이션을 실행하는 작업 실행기 정의
+# 작업은 스레드 풀에서 실행되고 진행 상황과 결과는 스레드 안전한 큐로 보내며,
+# UI 스레드는 after로 큐를 주기적으로 확인해 콜백을 호출 (진행률은 작업마다 마지막 것만 전달)
+class JobRunner:
+    def __init__(self, widget, workers=1, poll_ms=JOB_POLL_MS):
+        self.widget = widget
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.messages = queue.Queue()
+        self.poll_ms = poll_ms
+        self.callbacks = {}  # 실행 중인 작업 -> (on_progress, on_done, on_error)
+        self._job = None
+
+    # 작업 제출: fn(job, *args)를 백그라운드에서 실행하고 콜백은 UI 스레드에서 호출
+    # on_error를 주지 않으면 오류는 메시지 상자로 알림 (다른 작업의 콜백은 그대로 처리)
+    def submit(self, fn, *args, on_progress=None, on_done=None, on_error=None):
+        job = Job(self.messages)
+        self.callbacks[job] = (on_progress, on_done, on_error)
+        self.executor.submit(self._run, job, fn, args)
+        if self._job is None:
+            self._job = self.widget.after(self.poll_ms, self._poll)
+        return job
+
+    def _run(self, job, fn, args):
+        try:
+            self.messages.put((job, "done", fn(job, *args)))
+        except JobCancelled:
+            self.messages.put((job, "cancelled", None))
+        except Exception as error:
+            self.messages.put((job, "error", error))
+
+    def _poll(self):
+        self._job = None
+        progress = {}
+        finished = []
+        while True:
+            try:
+                job, kind, value = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                progress[job] = value
+            else:
+                progress.pop(job, None)
+                finished.append((job, kind, value))
+        if len(self.callbacks) > len(finished):
+            self._job = self.widget.after(self.poll_ms, self._poll)
+
+        for job, (fraction, result) in progress.items():
+            on_progress = self.callbacks[job][0]
+            if on_progress is not None and not job.cancelled:
+                on_progress(fraction, result)
+        for job, kind, value in finished:
+            _, on_done, on_error = self.callbacks.pop(job)
+            job.status = "cancelled" if job.cancelled else kind  # 끝난 뒤 취소된 작업의 결과는 버림
+            kind = job.status
+            if kind == "done" and on_done is not None:
+                on_done(value)
+            elif kind == "error":
+                (on_error or self.report_error)(value)
+
+    @staticmethod
+    def report_error(error):
+        messagebox.showerror("작업 오류", f"백그라운드 작업 중 오류가 발생했습니다.\n{error}")
+
+    # 실행 중인 작업을 모두 취소하고 스레드 풀 종료 (대기 중인 작업은 버리고, 실행 중인 작업은 다음 report()에서 멈춤)
+    def shutdown(self):
+        for job in list(self.callbacks):
+            job.cancel()
+        self.callbacks.clear()
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 격자 렌더러 설정
+GRID_LABEL_MIN_CELL = 25  # 이 크기(px) 이상인 칸에만 번호/값 글자를 표시
+GRID_PARTIAL_LIMIT = 256  # 바뀐 칸이 이보다 많으면 비트맵 전체를 다시 만듦
+GRID_MAX_ITEMS = 1 << 22  # 한 격자에 표시하는 최대 항목 수
+
+# 검색 격자 색상 (뒤에 있을수록 우선: 한 칸에 여러 항목이 모이면 가장 뒤의 색으로 표시)
+SEARCH_PALETTE = ("#d3d3d3", "#ffc0cb", "#d0d0ff", "#ffff00", "#ff0000", "#008000")
+
+# 확률 격자 색상: 확률 0~1을 256단계로 나눈 probability_color, 그 뒤에 표시/발견 색
+PROBABILITY_PALETTE = tuple(probability_color(k / 255) for k in range(256)) + ("#ff0000", "#008000")
+
+
+# 확률을 PROBABILITY_PALETTE의 단계(0~255)로 변환
+def probability_levels(probs):
+    return np.rint(np.clip(probs, 0, 1) * 255).astype(np.uint16)
+
+
+# 항목별 색 번호 배열을 비트맵(PhotoImage) 하나로 그리는 격자 렌더러 정의
+# 항목마다 사각형/글자 캔버스 항목을 만드는 대신 NumPy로 픽셀을 계산하며, 캔버스 크기보다 항목이 많으면
+# 한 칸(픽셀)에 여러 항목을 모아 가장 우선인 색으로 표시
+# flush()는 바뀐 칸만 다시 칠하고, 많이 바뀌었으면 PPM 비트맵을 통째로 새로 만듦
+# 칸이 GRID_LABEL_MIN_CELL 이상일 때만 글자 항목을 만듦
+class GridRenderer:
+    def __init__(self, canvas, count, palette, x=10, y=10, width=390, height=290, cell=25):
+        if not 1 <= count <= GRID_MAX_ITEMS:
+            raise ValueError(f"count must be within [1, {GRID_MAX_ITEMS}]")
+        self.canvas = canvas
+        self.count = count
+        self.x, self.y = x, y
+        self.palette = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in palette], dtype=np.uint8)
+        self.color_index = {c: i for i, c in enumerate(palette)}
+        self.values = np.zeros(count, dtype=np.uint16)  # 항목별 색 번호
+
+        # 배치: 한 칸에 담을 항목 수(per), 칸 크기(cell), 열/행 수
+        self.per = -(-count // (width * height))
+        self.cells = -(-count // self.per)
+        self.cell = max(1, min(cell, math.isqrt(width * height // self.cells)))
+        while self.cell > 1 and -(-self.cells // (width // self.cell)) * self.cell > height:
+            self.cell -= 1
+        self.cols = width // self.cell
+        self.rows = -(-self.cells // self.cols)
+
+        # 칸 모양: 0 = 배경, 1 = 테두리, 2 = 채움 (큰 칸은 간격과 검은 테두리, 작은 칸은 간격만 또는 없음)
+        gap = self.cell // 5 if self.cell >= 8 else (1 if self.cell >= 4 else 0)
+        self.box = self.cell - gap
+        self.outline = 1 if self.cell >= 8 else 0
+        self.template = np.zeros((self.cell, self.cell), dtype=np.uint8)
+        self.template[:self.box, :self.box] = 1 if self.outline else 2
+        self.template[self.outline:self.box - self.outline, self.outline:self.box - self.outline] = 2
+
+        self.show_labels = self.cell >= GRID_LABEL_MIN_CELL and self.per == 1
+        self.labels = []
+        self.image = None
+        self.item = None
+        self._dirty = []
+        self._full = True
+        self.flush()
+
+    def _lookup(self, color):
+        return self.color_index[color] if isinstance(color, str) else color
+
+    # 항목(정수, 슬라이스 또는 인덱스 배열)의 색 지정 (색 이름 또는 팔레트 번호, 번호 배열도 가능)
+    def fill(self, index, color):
+        self.values[index] = self._lookup(color)
+        if isinstance(index, slice):
+            if index == slice(None):
+                self._full = True
+            else:
+                self._dirty.append(np.arange(*index.indices(self.count)) // self.per)
+        else:
+            self._dirty.append(np.atleast_1d(np.asarray(index)) // self.per)
+
+    # 칸별 대표 색 번호 (여러 항목이 모인 칸은 가장 큰 번호)
+    def _cell_values(self, cells=None):
+        if self.per == 1:
+            return self.values if cells is None else self.values[cells]
+        padded = np.zeros(self.cells * self.per, dtype=self.values.dtype)
+        padded[:self.count] = self.values
+        grouped = padded.reshape(self.cells, self.per)
+        return grouped.max(axis=1) if cells is None else grouped[cells].max(axis=1)
+
+    # 바뀐 내용을 비트맵에 반영
+    def flush(self):
+        dirty = None if self._full else np.unique(np.concatenate(self._dirty or [np.zeros(0, dtype=np.intp)]))
+        self._dirty = []
+        if self._full or dirty.size > GRID_PARTIAL_LIMIT:
+            self._full = False
+            self._redraw()
+            return
+        off = self.outline
+        for cell, value in zip(dirty, self._cell_values(dirty)):
+            row, col = divmod(int(cell), self.cols)
+            x0, y0 = col * self.cell, row * self.cell
+            r, g, b = self.palette[value]
+            self.image.put(f"#{r:02x}{g:02x}{b:02x}",
+                           to=(x0 + off, y0 + off, x0 + self.box - off, y0 + self.box - off))
+
+    # 비트맵 전체를 PPM으로 만들어 교체
+    def _redraw(self):
+        colors = np.full((self.rows * self.cols, 3), 255, dtype=np.uint8)
+        colors[:self.cells] = self.palette[self._cell_values()]
+        pixels = colors.reshape(self.rows, self.cols, 3).repeat(self.cell, axis=0).repeat(self.cell, axis=1)
+        shape = np.tile(self.template, (self.rows, self.cols))
+        if self.cells % self.cols:
+            shape[(self.rows - 1) * self.cell:, (self.cells % self.cols) * self.cell:] = 0  # 마지막 행의 빈 칸
+        pixels[shape == 0] = 255
+        pixels[shape == 1] = 0
+        height, width = pixels.shape[:2]
+        self.image = tk.PhotoImage(master=self.canvas, data=b"P6 %d %d 255\n" % (width, height) + pixels.tobytes(),
+                                   format="PPM")
+        if self.item is None:
+            self.item = self.canvas.create_image(self.x, self.y, anchor="nw", image=self.image)
+        else:
+            self.canvas.itemconfig(self.item, image=self.image)
+
+    # 칸 가운데에 글자 표시 (칸이 충분히 클 때만)
+    def set_labels(self, texts):
+        if not self.show_labels:
+            return
+        for i, text in enumerate(texts):
+            if i < len(self.labels):
+                self.canvas.itemconfig(self.labels[i], text=text)
+            else:
+                row, col = divmod(i, self.cols)
+                cx = self.x + col * self.cell + self.box / 2
+                cy = self.y + row * self.cell + self.box / 2
+                self.labels.append(self.canvas.create_text(cx, cy, text=text, font=("Arial", 8)))
+
+
+# 노트북 탭 (프레임 속성 이름, 탭 이름, 구성 메서드) - 탭 내용은 처음 선택될 때 만듦
+TABS = (
+    ("main_frame", "검색 애니메이션", "setup_main_tab"),
+    ("graph_frame", "복잡도 그래프", "setup_graph_tab"),
+    ("parallel_frame", "병렬 검색 시뮬레이션", "setup_parallel_tab"),
+    ("probability_frame", "확률 분포 시뮬레이션", "setup_probability_tab"),
+    ("info_frame", "추가 정보", "setup_info_tab"),
+    ("gate_simulator_frame", "게이트 시뮬레이터", "setup_gate_simulator_tab"),
+)
+
+
 # 메인 애플리케이션 클래스 정의
 class App:
-    def __init__(self, root):
+    def __init__(self, root, timing=False):
         self.root = root
+        self.timing = timing  # 시작/탭 생성 시간을 출력할지 여부
         self.root.title("고전 vs 양자 검색 비교 프로젝트")
 
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill="both", expand=True)
 
-        # 기존 탭들 설정
-        self.setup_existing_tabs()
+        # 탭별로 재생 중인 애니메이션 (탭마다 독립적으로 재생)
+        self.animations = {}
 
-        # 게이트 시뮬레이터 탭 추가
-        self.gate_simulator_frame = tk.Frame(self.notebook)
-        self.notebook.add(self.gate_simulator_frame, text="게이트 시뮬레이터")
-        self.setup_gate_simulator_tab()
+        # 무거운 계산은 백그라운드 작업으로 실행 (탭별로 실행 중인 작업)
+        self.runner = JobRunner(root)
+        self.jobs = {}
+        self.gate_simulators = []  # 열린 게이트 시뮬레이터 창 (창마다 자기 작업 실행기를 가짐)
 
-    def setup_existing_tabs(self):
-        # 메인 탭
-        self.main_frame = tk.Frame(self.notebook)
-        self.notebook.add(self.main_frame, text="검색 애니메이션")
-        self.setup_main_tab()
+        # 창을 닫으면 실행 중인 작업을 취소하고 작업 스레드를 정리
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
-        # 복잡도 그래프 탭
-        self.graph_frame = tk.Frame(self.notebook)
-        self.notebook.add(self.graph_frame, text="복잡도 그래프")
-        self.setup_graph_tab()
+        # 탭은 빈 프레임만 먼저 붙이고, 내용은 처음 선택될 때 만듦
+        self.setup_tabs()
 
-        # 병렬 검색 시뮬레이션 탭
-        self.parallel_frame = tk.Frame(self.notebook)
-        self.notebook.add(self.parallel_frame, text="병렬 검색 시뮬레이션")
-        self.setup_parallel_tab()
+    def setup_tabs(self):
+        self.built_tabs = set()
+        for attr, text, setup in TABS:
+            frame = tk.Frame(self.notebook)
+            setattr(self, attr, frame)
+            self.notebook.add(frame, text=text)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.build_tab(self.notebook.index(self.notebook.select()))
 
-        # 확률 분포 시뮬레이션 탭
-        self.probability_frame = tk.Frame(self.notebook)
-        self.notebook.add(self.probability_frame, text="확률 분포 시뮬레이션")
-        self.setup_probability_tab()
+    def on_tab_changed(self, event):
+        self.build_tab(self.notebook.index(self.notebook.select()))
 
-        # 추가 정보 탭
-        self.info_frame = tk.Frame(self.notebook)
-        self.notebook.add(self.info_frame, text="추가 정보")
-        self.setup_info_tab()
+    # index번째 탭을 아직 만들지 않았으면 만듦
+    def build_tab(self, index):
+        if index in self.built_tabs:
+            return
+        self.built_tabs.add(index)
+        attr, text, setup = TABS[index]
+        start = time.perf_counter()
+        getattr(self, setup)()
+        if self.timing:
+            print(f"탭 생성 '{text}': {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # 첫 화면이 그려진 뒤 모듈 로드부터 걸린 시간을 출력
+    def report_startup(self):
+        self.root.update_idletasks()
+        print(f"첫 화면까지: {(time.perf_counter() - START_TIME) * 1000:.1f} ms")
 
     def setup_main_tab(self):
         # 한 줄 소개 레이블 추가
@@ -242,6 +737,7 @@ class App:
         # 실행 버튼
         self.run_button_main = tk.Button(input_frame, text="실행", command=self.run_search)
         self.run_button_main.grid(row=2, column=0, columnspan=3, pady=10)
+        self.add_animation_controls(input_frame, "main").grid(row=3, column=0, columnspan=3)
 
         # 결과 레이블
         self.result_label_main = tk.Label(self.main_frame, text="결과 대기중...", font=("Arial", 10))
@@ -265,6 +761,68 @@ class App:
         self.quantum_canvas_main = tk.Canvas(self.quantum_frame_main, width=400, height=300, bg="white")
         self.quantum_canvas_main.pack()
 
+    # 애니메이션 일시정지/배속/취소 버튼 묶음
+    def add_animation_controls(self, parent, key):
+        frame = tk.Frame(parent)
+        speed_button = tk.Button(frame, text="빠르게 (x1)", width=10)
+
+        def control(action):
+            job = self.jobs.get(key)
+            if action == "cancel" and job is not None and job.status == "running":
+                job.cancel()
+            animation = self.animations.get(key)
+            if animation is None or not animation.running:
+                return
+            if action == "pause":
+                animation.toggle_pause()
+            elif action == "speed":
+                speed_button.config(text=f"빠르게 (x{animation.speed_up()})")
+            else:
+                animation.cancel()
+
+        tk.Button(frame, text="일시정지/계속", command=lambda: control("pause")).pack(side=tk.LEFT, padx=2)
+        speed_button.config(command=lambda: control("speed"))
+        speed_button.pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="취소", command=lambda: control("cancel")).pack(side=tk.LEFT, padx=2)
+        return frame
+
+    # 탭의 새 애니메이션 시작 (같은 탭에서 재생 중이던 애니메이션은 취소)
+    def start_animation(self, key, widget, frames, on_done=None):
+        previous = self.animations.get(key)
+        if previous is not None:
+            previous.cancel()
+        self.animations[key] = Animation(widget, frames, on_done).start()
+        return self.animations[key]
+
+    # 탭의 새 백그라운드 작업 시작 (같은 탭에서 실행 중이던 작업은 취소)
+    # 진행률은 label에 표시하고, 작업이 실패하면 오류 메시지를 표시
+    def start_job(self, key, label, fn, *args, on_done=None):
+        previous = self.jobs.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        def on_progress(fraction, result):
+            label.config(text=f"계산 중... {fraction:.0%}")
+
+        def on_error(error):
+            label.config(text=f"계산 오류: {error}")
+
+        self.jobs[key] = self.runner.submit(fn, *args, on_progress=on_progress, on_done=on_done, on_error=on_error)
+        return self.jobs[key]
+
+    # 고전적 순차 검색 프레임: 칸을 차례로 노랗게(검사 중) 칠하고 다음 프레임에서 분홍(실패)으로 바꿈
+    # 칸이 ANIMATION_MAX_FRAMES보다 많으면 한 프레임에 연속된 여러 칸을 함께 진행
+    @staticmethod
+    def sweep_frames(grid, count, hold=50):
+        stride = -(-count // ANIMATION_MAX_FRAMES)
+        frames = []
+        for start in range(0, count, stride):
+            ops = [partial(grid.fill, slice(start, min(start + stride, count)), "#ffff00"), grid.flush]
+            if start:
+                ops.insert(0, partial(grid.fill, slice(start - stride, start), "#ffc0cb"))
+            frames.append((ops, hold))
+        return frames
+
     def set_N(self, entry_widget, value):
         entry_widget.delete(0, tk.END)
         entry_widget.insert(0, str(value))
@@ -282,77 +840,23 @@ class App:
             self.result_label_main.config(text="0 <= M < N 범위로 입력해주세요.")
             return
 
-        # 기존 캔버스 초기화
+        if N > GRID_MAX_ITEMS:
+            self.result_label_main.config(text=f"N은 {GRID_MAX_ITEMS} 이하로 입력해주세요.")
+            return
+
+        # 기존 캔버스 초기화 (재생 중인 애니메이션과 계산은 먼저 멈춤)
+        if "main" in self.animations:
+            self.animations["main"].cancel()
+        if "main" in self.jobs:
+            self.jobs["main"].cancel()
         self.classical_canvas_main.delete("all")
         self.quantum_canvas_main.delete("all")
         self.result_label_main.config(text="실행 중...")
 
-        box_width = 20
-        spacing = 5
-        max_per_row = 15  # 한 행에 최대 15개
-        start_x = 10
-        start_y = 10
-
-        def draw_boxes(canvas, N, initial_color="#d0d0ff"):
-            boxes = []
-            for i in range(N):
-                row = i // max_per_row
-                col = i % max_per_row
-                x0 = start_x + col * (box_width + spacing)
-                y0 = start_y + row * (box_width + spacing)
-                x1 = x0 + box_width
-                y1 = y0 + box_width
-                rect = canvas.create_rectangle(x0, y0, x1, y1, fill=initial_color, outline="black")
-                canvas.create_text(x0 + box_width / 2, y0 + box_width / 2, text=str(i), font=("Arial", 8))
-                boxes.append(rect)
-            return boxes
-
-        # 고전적 검색
-        classical_boxes = draw_boxes(self.classical_canvas_main, N, initial_color="lightgray")
-        classical_count = 0
-        for i in range(N):
-            self.classical_canvas_main.itemconfig(classical_boxes[i], fill="yellow")
-            self.classical_canvas_main.update()
-            time.sleep(0.05)
-            classical_count += 1
-            if i == M:
-                self.classical_canvas_main.itemconfig(classical_boxes[i], fill="green")
-                self.classical_canvas_main.update()
-                break
-            else:
-                self.classical_canvas_main.itemconfig(classical_boxes[i], fill="pink")
-
-        # 양자적 검색
-        quantum_boxes = draw_boxes(self.quantum_canvas_main, N, initial_color="#d0d0ff")
-        self.quantum_canvas_main.update()
-        time.sleep(0.5)
-
-        # 오라클 마킹
-        self.quantum_canvas_main.itemconfig(quantum_boxes[M], fill="red")
-        self.quantum_canvas_main.update()
-        time.sleep(0.5)
-
-        # 증폭 단계 (단순 색상 변환)
-        for step in range(3):
-            for i in range(N):
-                if i == M:
-                    colors = ["#ff8080", "#ffb080", "#80ff80"]
-                    self.quantum_canvas_main.itemconfig(quantum_boxes[i], fill=colors[step])
-                else:
-                    shades = ["#c0c0ff", "#a0a0ff", "#90ffa0"]
-                    self.quantum_canvas_main.itemconfig(quantum_boxes[i], fill=shades[step])
-            self.quantum_canvas_main.update()
-            time.sleep(0.5)
-
-        # 측정
-        self.quantum_canvas_main.itemconfig(quantum_boxes[M], fill="green")
-        for i in range(N):
-            if i != M:
-                self.quantum_canvas_main.itemconfig(quantum_boxes[i], fill="#e0ffe0")
-        self.quantum_canvas_main.update()
-
-        q_steps = math.ceil(math.sqrt(N))
-        self.result_label_main.config(text=f"클래식 컴퓨터: {classical_count}회 / 양자 컴퓨터: {q_steps}회\nN이 커질수록 차이가 커집니다!")
+        classical = GridRenderer(self.classical_canvas_main, N, SEARCH_PALETTE)
+        classical.set_labels(str(i) for i in range(N))
+        quantum = GridRenderer(self.quantum_canvas_main, N, PROBABILITY_PALETTE)
+        quantum.set_labels(str(i) for i in range(N))
 
         # 추가 재미 요소: 실행 후 랜덤한 양자 잡학/농담 표시
         fun_facts = [
@@ -362,9 +866,60 @@ class App:
             "양자 난수는 진짜 난수가 될 수도 있어!"
         ]
         fact = random.choice(fun_facts)
-        self.result_label_main.config(text=self.result_label_main.cget("text") + "\n" + fact)
+
+        # 그로버 반복은 백그라운드에서 계산하고, 끝나면 프레임 목록을 만들어 애니메이션 시작
+        def start(result):
+            q_steps, history, success, measured = result
+            self.result_label_main.config(text="실행 중...")
+
+            # 프레임 목록: [(갱신 목록, 유지 시간 ms), ...]
+            frames = []
+
+            # 고전적 검색: 칸을 차례로 노랗게 칠하고, 다음 프레임에서 분홍(실패) 또는 초록(발견)으로 바꿈
+            classical_count = M + 1
+            frames.extend(self.sweep_frames(classical, classical_count))
+            frames.append(([partial(classical.fill, M, "#008000"), classical.flush], 0))
+
+            # 양자적 검색: 그로버 엔진의 실제 진폭으로 색상 표시 (표시 항목과 나머지 항목의 확률만 기록)
+            stride = -(-len(history) // ANIMATION_MAX_FRAMES)
+
+            def paint(marked_prob, other_prob):
+                quantum.fill(slice(None), probability_levels(other_prob))
+                quantum.fill(M, probability_levels(marked_prob))
+                quantum.flush()
+
+            frames.append(([partial(paint, *history[0])], 500))
+
+            # 오라클 마킹
+            frames.append(([partial(quantum.fill, M, "#ff0000"), quantum.flush], 500))
+
+            # 증폭 단계: 반복마다 확률 분포를 다시 칠함
+            for marked_prob, other_prob in history[1::stride]:
+                frames.append(([partial(paint, marked_prob, other_prob)], 500))
+
+            # 측정: 최종 확률 분포에서 뽑은 값
+            frames.append(([partial(quantum.fill, measured, "#008000" if measured == M else "#ff0000"),
+                            quantum.flush], 0))
+
+            def show_result():
+                self.result_label_main.config(text=f"클래식 컴퓨터: {classical_count}회 / 양자 컴퓨터: {q_steps}회 "
+                                                   f"(성공 확률 {success:.1%}, 측정값 {measured})\n"
+                                                   f"N이 커질수록 차이가 커집니다!\n{fact}")
+
+            self.start_animation("main", self.quantum_canvas_main, frames, on_done=show_result)
+
+        self.start_job("main", self.result_label_main, grover_history_job, N, M, RESULT_CACHE, on_done=start)
 
     def setup_graph_tab(self):
+        # matplotlib은 무거우므로 이 탭을 처음 열 때 불러옴
+        try:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        except ImportError:
+            tk.Label(self.graph_frame, text="그래프를 그리려면 matplotlib 라이브러리가 필요합니다.",
+                     font=("Arial", 12)).pack(pady=20)
+            return
+
         # 한 줄 소개 레이블 추가
         intro_label = tk.Label(self.graph_frame, text="연산 복잡도 시각화 및 비교", font=("Arial", 12, "bold"))
         intro_label.pack(pady=10)
@@ -388,9 +943,15 @@ class App:
         self.run_button_graph = tk.Button(top_frame, text="실행", command=self.update_graph_with_entry)
         self.run_button_graph.pack(side=tk.LEFT, padx=5)
 
-        # 슬라이더
-        self.N_slider_graph = tk.Scale(self.graph_frame, from_=1, to=200, orient="horizontal", command=self.update_graph)
-        self.N_slider_graph.set(50)
+        # 로그 축 선택
+        self.graph_log_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(top_frame, text="로그 축", variable=self.graph_log_var,
+                       command=lambda: self.redraw_graph()).pack(side=tk.LEFT, padx=5)
+
+        # 슬라이더 (로그 눈금: 값 v는 N = 10^v)
+        self.N_slider_graph = tk.Scale(self.graph_frame, from_=0, to=math.log10(GRAPH_SLIDER_MAX_N), resolution=0.01,
+                                       orient="horizontal", showvalue=False, length=400, command=self.update_graph)
+        self.N_slider_graph.set(math.log10(50))
         self.N_slider_graph.pack(pady=10)
 
         # 그래프 정보 레이블
@@ -403,49 +964,99 @@ class App:
         self.canvas_mpl_graph = FigureCanvasTkAgg(self.fig_graph, master=self.graph_frame)
         self.canvas_mpl_graph.get_tk_widget().pack()
 
-        self.update_graph(None)
+        # 점 집합은 한 번만 만들고 값만 바꿈 (animated: 전체 그리기에서 빼고 배경 위에 블리팅)
+        self.graph_classical = self.ax_graph.scatter([], [], c='red', label="Classical: O(N)", s=10, animated=True)
+        self.graph_quantum = self.ax_graph.scatter([], [], c='blue', label="Quantum: O(√N)", s=10, animated=True)
+        self.ax_graph.set_xlabel("Data Size N")  # X축 레이블 수정
+        self.ax_graph.set_ylabel("Computational Steps (Conceptual)")  # Y축 레이블 수정
+        self.ax_graph.set_title("Complexity Comparison: Classical vs Quantum")  # 제목 수정
+        self.ax_graph.legend()
+        self.graph_axes = None  # 현재 축 설정 (범위, 로그 여부)
+        self.graph_background = None  # 점을 뺀 그림 (블리팅용)
+        self.graph_job = None  # 대기 중인 슬라이더 갱신
+        self.canvas_mpl_graph.mpl_connect("draw_event", self.on_graph_draw)
+
+        self.redraw_graph()
 
     def update_graph_with_entry(self):
-        # N 입력값을 슬라이더에 반영하고 그래프 업데이트
+        # N 입력값을 슬라이더에 반영하고 그래프 업데이트 (슬라이더 범위를 넘는 N도 직접 입력 가능)
         try:
             N = int(self.entry_N_graph.get())
-            if N < 1 or N > 200:
+            if N < 1 or N > MAX_GRAPH_N:
                 raise ValueError
-            self.N_slider_graph.set(N)
+            self.N_slider_graph.set(math.log10(min(N, GRAPH_SLIDER_MAX_N)))
             self.update_graph(N)
         except ValueError:
-            messagebox.showerror("입력 오류", "N을 1에서 200 사이의 정수로 입력해주세요.")
+            messagebox.showerror("입력 오류", "N을 1에서 2^64 사이의 정수로 입력해주세요.")
 
+    # 정수 N은 바로 그리고, 슬라이더 이벤트는 GRAPH_DEBOUNCE_MS 동안 모아 마지막 값만 그림
     def update_graph(self, event):
         if isinstance(event, int):
-            N = event
-        else:
-            try:
-                N = int(self.entry_N_graph.get())
-                if N < 1 or N > 200:
-                    raise ValueError
-            except ValueError:
-                N = self.N_slider_graph.get()
-
-        classical = [i for i in range(1, N+1)]  # O(N)
-        quantum = [math.sqrt(i) for i in range(1, N+1)]  # O(√N)
-
-        self.ax_graph.clear()
-        # O(N) Scatter Plot (Red)
-        self.ax_graph.scatter(range(1, N+1), classical, c='red', label="Classical: O(N)", s=10)
-        # O(√N) Scatter Plot (Blue)
-        self.ax_graph.scatter(range(1, N+1), quantum, c='blue', label="Quantum: O(√N)", s=10)
-
-        # Set Y-axis range from 0 to N*1.1 for clarity
-        self.ax_graph.set_xlim(0, N+10)
-        self.ax_graph.set_ylim(0, N*1.1)
-        self.ax_graph.set_xlabel("Data Size N")  # X축 레이블 수정
-        self.ax_graph.set_ylabel("Computational Steps (Conceptual)")  # Y축 레이블 수정
-        self.ax_graph.set_title("Complexity Comparison: Classical vs Quantum")  # 제목 수정
-        self.ax_graph.legend()
+            self.redraw_graph(event)
+            return
+        if self.graph_job is not None:
+            self.graph_frame.after_cancel(self.graph_job)
+        self.graph_job = self.graph_frame.after(GRAPH_DEBOUNCE_MS, self.redraw_graph)
+
+    # 그래프에 그릴 N: 입력칸 값이 올바르면 그 값, 아니면 슬라이더 값
+    def graph_N(self):
+        try:
+            N = int(self.entry_N_graph.get())
+            if N < 1 or N > MAX_GRAPH_N:
+                raise ValueError
+            return N
+        except ValueError:
+            return round(10 ** float(self.N_slider_graph.get()))
+
+    def redraw_graph(self, N=None):
+        self.graph_job = None
+        if N is None:
+            N = self.graph_N()
 
-        self.info_label_graph.config(text=f"N={N}, 클래식 컴퓨터: {N} steps, 양자컴퓨터: {int(math.sqrt(N))} steps (Conceptual)")
-        self.canvas_mpl_graph.draw()
+        # N이 크면 로그 간격으로 GRAPH_POINTS개 지점만 계산
+        if N <= GRAPH_POINTS:
+            sizes = np.arange(1, N + 1, dtype=np.float64)
+        else:
+            sizes = np.geomspace(1, float(N), GRAPH_POINTS)
+        classical = sizes  # O(N)
+        quantum = optimal_grover_iterations(sizes)  # O(√N): 실제 최적 그로버 반복 횟수
+        self.graph_classical.set_offsets(np.column_stack([sizes, classical]))
+        self.graph_quantum.set_offsets(np.column_stack([sizes, quantum]))
+
+        # 축 범위는 1-2-5 계단으로만 바뀌므로, 바뀔 때만 전체를 다시 그리고 나머지는 점만 블리팅
+        log = self.graph_log_var.get()
+        axes = (nice_limit(float(N) * 1.1), log)
+        if axes != self.graph_axes:
+            self.graph_axes = axes
+            limit = axes[0]
+            self.ax_graph.set_xscale("log" if log else "linear")
+            self.ax_graph.set_yscale("log" if log else "linear")
+            self.ax_graph.set_xlim(1 if log else 0, limit)
+            self.ax_graph.set_ylim(0.5 if log else 0, limit)
+            self.canvas_mpl_graph.draw()
+        else:
+            self.blit_graph()
+
+        engine = ReducedGroverSearch(N)
+        q_steps = engine.optimal_iterations()
+        self.info_label_graph.config(text=f"N={N}, 클래식 컴퓨터: {N} steps, 양자컴퓨터: {q_steps} steps "
+                                          f"(성공 확률 {float(engine.success_probability(q_steps)):.2%})")
+
+    # 전체 그리기 직후: 점을 뺀 배경을 저장하고 점을 그 위에 그림
+    def on_graph_draw(self, event):
+        self.graph_background = self.canvas_mpl_graph.copy_from_bbox(self.fig_graph.bbox)
+        self.ax_graph.draw_artist(self.graph_classical)
+        self.ax_graph.draw_artist(self.graph_quantum)
+
+    # 저장한 배경을 복원하고 점만 다시 그려 화면에 복사
+    def blit_graph(self):
+        if self.graph_background is None:
+            self.canvas_mpl_graph.draw()
+            return
+        self.canvas_mpl_graph.restore_region(self.graph_background)
+        self.ax_graph.draw_artist(self.graph_classical)
+        self.ax_graph.draw_artist(self.graph_quantum)
+        self.canvas_mpl_graph.blit(self.fig_graph.bbox)
 
     def setup_parallel_tab(self):
         # 한 줄 소개 레이블 추가
@@ -478,6 +1089,7 @@ class App:
         # 실행 버튼
         self.run_parallel_button = tk.Button(input_frame, text="실행", command=self.run_parallel_search)
         self.run_parallel_button.grid(row=2, column=0, columnspan=3, pady=10)
+        self.add_animation_controls(input_frame, "parallel").grid(row=3, column=0, columnspan=3)
 
         # 결과 레이블
         self.parallel_result_label = tk.Label(self.parallel_frame, text="결과 대기중...", font=("Arial", 10))
@@ -514,76 +1126,58 @@ class App:
             self.parallel_result_label.config(text="0 <= M < N 범위로 입력해주세요.")
             return
 
-        # 기존 캔버스 초기화
+        if N > GRID_MAX_ITEMS:
+            self.parallel_result_label.config(text=f"N은 {GRID_MAX_ITEMS} 이하로 입력해주세요.")
+            return
+
+        # 기존 캔버스 초기화 (재생 중인 애니메이션과 계산은 먼저 멈춤)
+        if "parallel" in self.animations:
+            self.animations["parallel"].cancel()
+        if "parallel" in self.jobs:
+            self.jobs["parallel"].cancel()
         self.parallel_classical_canvas.delete("all")
         self.parallel_quantum_canvas.delete("all")
         self.parallel_result_label.config(text="실행 중...")
 
-        box_width = 20
-        spacing = 5
-        max_per_row = 15  # 한 행에 최대 15개
-        start_x = 10
-        start_y = 10
-
-        def draw_boxes(canvas, N, initial_color="#d0d0ff"):
-            boxes = []
-            for i in range(N):
-                row = i // max_per_row
-                col = i % max_per_row
-                x0 = start_x + col * (box_width + spacing)
-                y0 = start_y + row * (box_width + spacing)
-                x1 = x0 + box_width
-                y1 = y0 + box_width
-                rect = canvas.create_rectangle(x0, y0, x1, y1, fill=initial_color, outline="black")
-                canvas.create_text(x0 + box_width / 2, y0 + box_width / 2, text=str(i), font=("Arial", 8))
-                boxes.append(rect)
-            return boxes
-
-        # 고전적 검색
-        classical_boxes = draw_boxes(self.parallel_classical_canvas, N, initial_color="lightgray")
-        classical_count = 0
-        for i in range(N):
-            self.parallel_classical_canvas.itemconfig(classical_boxes[i], fill="yellow")
-            self.parallel_classical_canvas.update()
-            time.sleep(0.05)
-            classical_count += 1
-            if i == M:
-                self.parallel_classical_canvas.itemconfig(classical_boxes[i], fill="green")
-                self.parallel_classical_canvas.update()
-                break
-            else:
-                self.parallel_classical_canvas.itemconfig(classical_boxes[i], fill="pink")
-
-        # 병렬 검색
-        quantum_boxes = draw_boxes(self.parallel_quantum_canvas, N, initial_color="#d0d0ff")
-        self.parallel_quantum_canvas.update()
-        time.sleep(0.5)
-
-        # 병렬적으로 여러 박스를 동시에 검사하는 애니메이션
-        steps = math.ceil(math.sqrt(N))
-        found = False
-        q_steps = 0
-        for step in range(steps):
-            q_steps += 1
-            # 랜덤하게 k개의 박스를 선택 (k = steps)
-            k = min(steps, N)
-            indices = random.sample(range(N), k)
-            for i in indices:
-                if i == M:
-                    self.parallel_quantum_canvas.itemconfig(quantum_boxes[i], fill="green")
-                    found = True
-                else:
-                    self.parallel_quantum_canvas.itemconfig(quantum_boxes[i], fill="yellow")
-            self.parallel_quantum_canvas.update()
-            time.sleep(0.5)
-            # 선택한 박스 다시 원래 색으로
-            for i in indices:
-                if i != M:
-                    self.parallel_quantum_canvas.itemconfig(quantum_boxes[i], fill="#d0d0ff")
-            if found:
-                break
-
-        self.parallel_result_label.config(text=f"고전적: {classical_count}회 / 병렬적: {q_steps}회\n병렬적 검색은 동시에 여러 시도를 함으로써 빠르게 결과를 얻습니다!")
+        classical = GridRenderer(self.parallel_classical_canvas, N, SEARCH_PALETTE)
+        classical.set_labels(str(i) for i in range(N))
+        quantum = GridRenderer(self.parallel_quantum_canvas, N, SEARCH_PALETTE)
+        quantum.fill(slice(None), "#d0d0ff")
+        quantum.set_labels(str(i) for i in range(N))
+
+        # 반복마다 고를 박스는 백그라운드에서 계산하고, 끝나면 프레임 목록을 만들어 애니메이션 시작
+        def start(picks):
+            q_steps = len(picks)
+            self.parallel_result_label.config(text="실행 중...")
+
+            # 프레임 목록: [(갱신 목록, 유지 시간 ms), ...]
+            frames = []
+
+            # 고전적 검색
+            classical_count = M + 1
+            frames.extend(self.sweep_frames(classical, classical_count))
+            frames.append(([partial(classical.fill, M, "#008000"), classical.flush], 0))
+
+            # 병렬 검색: 반복이 ANIMATION_MAX_FRAMES보다 많으면 stride번째 반복만 표시 (표시 항목을 찾은 마지막 반복은 항상 포함)
+            frames.append(([quantum.flush], 500))
+            stride = -(-q_steps // ANIMATION_MAX_FRAMES)
+            previous = np.zeros(0, dtype=np.intp)
+            for indices in picks[(q_steps - 1) % stride::stride]:
+                # 이전 프레임에서 선택한 박스는 원래 색으로 되돌림
+                ops = [partial(quantum.fill, previous[previous != M], "#d0d0ff"),
+                       partial(quantum.fill, indices, "#ffff00")]
+                if M in indices:
+                    ops.append(partial(quantum.fill, M, "#008000"))
+                frames.append((ops + [quantum.flush], 500))
+                previous = indices
+            frames.append(([partial(quantum.fill, previous[previous != M], "#d0d0ff"), quantum.flush], 0))
+
+            def show_result():
+                self.parallel_result_label.config(text=f"고전적: {classical_count}회 / 병렬적: {q_steps}회\n병렬적 검색은 동시에 여러 시도를 함으로써 빠르게 결과를 얻습니다!")
+
+            self.start_animation("parallel", self.parallel_quantum_canvas, frames, on_done=show_result)
+
+        self.start_job("parallel", self.parallel_result_label, parallel_search_job, N, M, on_done=start)
 
     def setup_probability_tab(self):
         # 한 줄 소개 레이블 추가
@@ -615,6 +1209,7 @@ class App:
         # 실행 버튼
         self.run_prob_button = tk.Button(input_frame, text="실행", command=self.run_probability_simulation)
         self.run_prob_button.grid(row=2, column=0, columnspan=3, pady=10)
+        tk.Button(input_frame, text="취소", command=self.cancel_probability_simulation).grid(row=3, column=0, columnspan=3)
 
         # 결과 레이블
         self.prob_result_label = tk.Label(self.probability_frame, text="결과 대기중...", font=("Arial", 10))
@@ -656,48 +1251,36 @@ class App:
         self.quantum_prob_canvas.delete("all")
         self.prob_result_label.config(text="실행 중...")
 
-        box_width = 20
-        spacing = 5
-        max_per_row = 15  # 한 행에 최대 15개
-        start_x = 10
-        start_y = 10
-
-        def draw_prob_distribution(canvas, N, M, is_classical=True):
-            for i in range(N):
-                row = i // max_per_row
-                col = i % max_per_row
-                x0 = start_x + col * (box_width + spacing)
-                y0 = start_y + row * (box_width + spacing)
-                x1 = x0 + box_width
-                y1 = y0 + box_width
-
-                if is_classical:
-                    # 고전적 검색: 모든 박스 확률 동일
-                    prob = 1 / N
-                    color_intensity = int(255 * prob)
-                    color = f"#{color_intensity:02x}{color_intensity:02x}{color_intensity:02x}"
-                else:
-                    # 양자적 검색: 목표 박스 확률 높음
-                    if i == M:
-                        prob = 0.5  # 예시: 50% 확률
-                        color = "#80ff80"  # 초록색
-                    else:
-                        prob = (1 - 0.5) / (N - 1)  # 나머지 분포
-                        color_intensity = int(255 * prob)
-                        color = f"#{color_intensity:02x}{color_intensity:02x}{color_intensity:02x}"
-
-                canvas.create_rectangle(x0, y0, x1, y1, fill=color, outline="black")
-                canvas.create_text(x0 + box_width / 2, y0 + box_width / 2, text=f"{prob:.2f}", font=("Arial", 8))
-
-        # 고전적 확률 분포
-        draw_prob_distribution(self.classical_prob_canvas, N, M, is_classical=True)
-        self.classical_prob_canvas.update()
-
-        # 양자적 확률 분포
-        draw_prob_distribution(self.quantum_prob_canvas, N, M, is_classical=False)
-        self.quantum_prob_canvas.update()
-
-        self.prob_result_label.config(text=f"N={N}, M={M}\n고전적 검색: 모든 항목이 동일 확률\n양자적 검색: 목표 항목 확률 증가")
+        def draw_prob_distribution(canvas, probs):
+            grid = GridRenderer(canvas, probs.size, PROBABILITY_PALETTE)
+            grid.fill(slice(None), probability_levels(probs))
+            grid.flush()
+            grid.set_labels(f"{prob:.2f}" for prob in probs)
+
+        # 캔버스 격자에 들어가는 만큼만, M이 포함된 구간을 표시
+        visible = GRID_MAX_ITEMS
+        first = (M // visible) * visible
+        count = min(visible, N - first)
+
+        # 고전적 확률 분포: 모든 박스 확률 동일
+        draw_prob_distribution(self.classical_prob_canvas, np.full(count, 1 / N))
+
+        # 양자적 확률 분포: 최적 횟수만큼 그로버 반복 후의 실제 확률 (백그라운드에서 계산)
+        def show(result):
+            iterations, probs, success = result
+            draw_prob_distribution(self.quantum_prob_canvas, probs)
+            shown = f" (표시: {first}~{first + count - 1}번)" if count < N else ""
+            self.prob_result_label.config(text=f"N={N}, M={M}{shown}\n고전적 검색: 모든 항목이 동일 확률\n"
+                                               f"양자적 검색: {iterations}회 반복 후 목표 항목 확률 {success:.1%}")
+
+        self.start_job("probability", self.prob_result_label, grover_distribution_job, N, M, first, count,
+                       RESULT_CACHE, on_done=show)
+
+    def cancel_probability_simulation(self):
+        job = self.jobs.get("probability")
+        if job is not None and job.status == "running":
+            job.cancel()
+            self.prob_result_label.config(text="취소되었습니다.")
 
     def setup_info_tab(self):
         # 한 줄 소개 레이블 추가
@@ -728,6 +1311,10 @@ class App:
         me_button = tk.Button(self.info_frame, text="만든 이", command=self.show_me)
         me_button.pack(pady=5)
 
+        # 결과 캐시 적중/실패 통계
+        cache_button = tk.Button(self.info_frame, text="결과 캐시 통계", command=self.show_cache_stats)
+        cache_button.pack(pady=5)
+
     def show_quantum_joke(self):
         jokes = [
             "양자 역학에서 고양이가 상자 안에 있을 때, '있으면서 없을 수도 있다'고 생각하면...\n그냥 열어서 확인하면 되잖아!",
@@ -763,6 +1350,15 @@ class App:
         ]
         messagebox.showinfo("만든 이의 말", random.choice(me))
 
+    def show_cache_stats(self):
+        stats = RESULT_CACHE.stats()
+        location = RESULT_CACHE.directory or "메모리만 사용"
+        messagebox.showinfo("결과 캐시 통계",
+                            f"적중: {stats['hits']}회 (디스크 {stats['disk_hits']}회) / 실패: {stats['misses']}회 "
+                            f"(적중률 {stats['hit_rate']:.0%})\n"
+                            f"저장된 결과: {stats['entries']}개, {stats['nbytes'] / 2 ** 20:.1f} MiB "
+                            f"(밀려난 결과 {stats['evictions']}개)\n저장 위치: {location}")
+
     def setup_gate_simulator_tab(self):
         # 게이트 시뮬레이터 탭에 실행 버튼 추가
         run_button = tk.Button(self.gate_simulator_frame, text="게이트 시뮬레이터 실행", command=self.launch_gate_simulator)
@@ -772,14 +1368,34 @@ class App:
         info_label = tk.Label(self.gate_simulator_frame, text="아래 버튼을 눌러 양자 게이트 시뮬레이터를 실행하세요.", font=("Arial", 12))
         info_label.pack(pady=10)
 
+        # 정밀도 선택 (complex64는 메모리와 대역폭이 절반)
+        precision_frame = tk.Frame(self.gate_simulator_frame)
+        precision_frame.pack(pady=5)
+        tk.Label(precision_frame, text="정밀도:").pack(side=tk.LEFT, padx=5)
+        self.precision_var = tk.StringVar(value="complex128")
+        for name in PRECISIONS:
+            tk.Radiobutton(precision_frame, text=name, value=name, variable=self.precision_var).pack(side=tk.LEFT)
+
     def launch_gate_simulator(self):
         # 새로운 창 생성
         simulator_window = tk.Toplevel(self.root)
-        simulator = GateSimulator(simulator_window)
+        # 측정이 긴 검색 작업 뒤에 줄 서지 않도록 시뮬레이터 창은 자기 작업 실행기를 사용
+        # 닫힌 창은 목록에서 빠져 엔진, 기록, 작업 실행기가 함께 해제됨
+        self.gate_simulators.append(GateSimulator(simulator_window, precision=self.precision_var.get(),
+                                                  on_close=self.gate_simulators.remove))
+
+    def close(self):
+        for simulator in self.gate_simulators:
+            simulator.runner.shutdown()
+        self.runner.shutdown()
+        self.root.destroy()
 
 
 # 메인 실행
 if __name__ == "__main__":
     root = tk.Tk()
-    app = App(root)
+    timing = "--timing" in sys.argv[1:]
+    app = App(root, timing=timing)
+    if timing:
+        root.after(0, app.report_startup)
     root.mainloop()
@@ -0,0 +1,2672 @@
+#20212426 정채호준 제작
+#구동 시 numpy 라이브러리 필요
+#[양자 컴퓨터 시뮬레이터] - GUI 없이 사용할 수 있는 시뮬레이션 엔진과 명령행 실행기
+#사용 예: python quantum_core.py circuit.json --shots 1000 -o result.npz (OpenQASM 2.0 파일은 circuit.qasm)
+import argparse
+import ast
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# 선택 가능한 상태 벡터 정밀도
+PRECISIONS = {"complex64": np.dtype(np.complex64), "complex128": np.dtype(np.complex128)}
+
+# 공용 게이트 행렬 정의
+X_GATE = np.array([[0, 1], [1, 0]], dtype=np.complex128)  # Pauli-X 게이트
+H_GATE = (1 / np.sqrt(2)) * np.array([[1, 1], [1, -1]], dtype=np.complex128)  # Hadamard 게이트
+CNOT_GATE = np.array([[1, 0, 0, 0],
+                      [0, 1, 0, 0],
+                      [0, 0, 0, 1],
+                      [0, 0, 1, 0]], dtype=np.complex128)  # CNOT 게이트
+
+
+# 다차원 인덱스 공간을 chunk_size 이하의 블록(슬라이스 튜플)으로 나누는 함수
+def _iter_blocks(shape, chunk_size):
+    # 안쪽 축부터 통째로 담을 수 있는 만큼 묶음
+    inner = 1
+    axis = len(shape)
+    while axis > 0 and inner * shape[axis - 1] <= chunk_size:
+        axis -= 1
+        inner *= shape[axis]
+    if axis == 0:
+        yield tuple(slice(None) for _ in shape)
+        return
+
+    # 남은 축 중 가장 안쪽 축을 step 단위로 자르고, 바깥 축은 하나씩 순회
+    split = axis - 1
+    step = max(1, chunk_size // inner)
+    tail = tuple(slice(None) for _ in shape[axis:])
+    for outer in np.ndindex(*shape[:split]):
+        for start in range(0, shape[split], step):
+            yield outer + (slice(start, start + step),) + tail
+
+
+# 작업자 수별로 공유하는 스레드 풀 (NumPy 연산은 GIL을 놓으므로 스레드로 병렬 처리 가능)
+_thread_pools = {}
+
+
+def _get_thread_pool(workers):
+    pool = _thread_pools.get(workers)
+    if pool is None:
+        pool = _thread_pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="statevector")
+    return pool
+
+
+# 노름 오차 기록에 남길 최근 항목 수 (최대 오차는 max_norm_drift에 따로 유지)
+NORM_HISTORY_LIMIT = 1024
+
+
+# N-큐비트 상태 벡터 엔진 정의
+# 큐비트 0이 가장 높은 비트(|q0 q1 ... q(n-1)>)이며, 게이트는 대상 축만 분리한 뷰 위에서 제자리(in-place)로 적용
+# 블록끼리는 서로 독립이므로 상태가 parallel_threshold 이상이면 workers개 스레드에 나눠 처리
+# path를 주면 진폭을 메모리 대신 np.memmap 파일에 저장하며, 블록을 파일 앞쪽부터 순서대로 처리해 순차적으로 읽고 씀
+# dtype으로 정밀도(complex64/complex128)를 고르며, norm_check_interval개 게이트마다 노름 오차를 기록
+class StateVector:
+    def __init__(self, num_qubits, chunk_size=1 << 16, workers=None, parallel_threshold=1 << 18, path=None,
+                 dtype=np.complex128, norm_check_interval=0):
+        if num_qubits < 1:
+            raise ValueError("num_qubits must be at least 1")
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in PRECISIONS.values():
+            raise ValueError(f"dtype must be one of {list(PRECISIONS)}")
+        self.tolerance = float(np.sqrt(np.finfo(self.dtype).eps))  # 정밀도에 맞춘 비교 허용 오차
+        self.num_qubits = num_qubits
+        self.chunk_size = chunk_size  # 임시 배열 크기의 상한 (원소 수)
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.parallel_threshold = parallel_threshold  # 이보다 작은 상태는 직렬로 처리 (진폭 수)
+        self.path = path
+        if path is None:
+            self.data = np.zeros(2 ** num_qubits, dtype=self.dtype)
+        else:
+            self.data = np.memmap(path, dtype=self.dtype, mode="w+", shape=(2 ** num_qubits,))
+        self.data[0] = 1  # |00...0>
+        self.version = 0  # 상태가 바뀔 때마다 증가 (샘플러 캐시 무효화용)
+        self.last_gate_io = 0  # 마지막 게이트가 읽고 쓴 바이트 수
+        self.total_io = 0  # 지금까지 게이트가 읽고 쓴 바이트 수
+        self.gate_count = 0
+        self.norm_check_interval = norm_check_interval  # 0이면 자동 노름 검사 끔
+        self.norm_history = deque(maxlen=NORM_HISTORY_LIMIT)  # 최근 (게이트 수, |노름 - 1|) 기록
+        self.max_norm_drift = 0.0
+
+    # |00...0> 상태로 초기화
+    def reset(self):
+        self.data[:] = 0
+        self.data[0] = 1
+        self.version += 1
+
+    # memmap 저장소의 변경 내용을 파일에 기록
+    def flush(self):
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+
+    # 게이트 적용 후 처리: 건드린 진폭 수로 읽기+쓰기 바이트 수를 기록하고, 주기적으로 노름 오차 검사
+    def _finish_gate(self, touched):
+        self.last_gate_io = 2 * touched * self.data.itemsize
+        self.total_io += self.last_gate_io
+        self.version += 1
+        self.gate_count += 1
+        if self.norm_check_interval and self.gate_count % self.norm_check_interval == 0:
+            self.norm_drift()
+
+    # 대상 큐비트 축을 분리한 뷰와 나머지 축의 크기를 반환
+    def _split_view(self, qubits):
+        for q in qubits:
+            if not 0 <= q < self.num_qubits:
+                raise ValueError(f"qubit index {q} out of range for {self.num_qubits} qubits")
+        if len(set(qubits)) != len(qubits):
+            raise ValueError("target qubits must be distinct")
+
+        # 배치 축 등 앞쪽 축(data.shape[:-1])은 그대로 두고 마지막 축만 분리
+        lead = self.data.shape[:-1]
+        shape = []
+        prev = -1
+        for q in sorted(qubits):
+            shape.extend([2 ** (q - prev - 1), 2])
+            prev = q
+        shape.append(2 ** (self.num_qubits - prev - 1))
+        return self.data.reshape(lead + tuple(shape)), lead + tuple(shape[0::2])
+
+    # 블록 인덱스 사이에 대상 큐비트의 비트 값을 끼워 넣은 인덱스 생성
+    def _index(self, block, bits):
+        lead = self.data.ndim - 1
+        index = list(block[:lead + 1])
+        for bit, rest in zip(bits, block[lead + 1:]):
+            index.extend([bit, rest])
+        return tuple(index)
+
+    # 모든 블록에 fn을 적용하고 fn이 돌려준 처리 원소 수의 합을 반환
+    # 큰 상태는 연속된 블록 묶음을 스레드마다 하나씩 맡겨, 각 스레드가 자기 구간을 순차적으로 처리
+    def _for_each_block(self, rest, fn):
+        blocks = _iter_blocks(rest, self.chunk_size)
+        if self.workers <= 1 or self.data.size < self.parallel_threshold:
+            return sum(fn(block) for block in blocks)
+
+        blocks = list(blocks)
+        count = min(self.workers, len(blocks))
+        bounds = [len(blocks) * i // count for i in range(count + 1)]
+        groups = [blocks[bounds[i]:bounds[i + 1]] for i in range(count)]
+
+        def run_group(group):
+            return sum(fn(block) for block in group)
+
+        # 결과를 모두 받아 작업 중 발생한 예외를 호출자에게 전달
+        return sum(_get_thread_pool(self.workers).map(run_group, groups))
+
+    # 2x2 행렬을 두 진폭 뷰에 제자리로 적용하고 건드린 원소 수를 반환
+    @staticmethod
+    def _apply_2x2(matrix, a0, a1):
+        u00, u01, u10, u11 = matrix[0, 0], matrix[0, 1], matrix[1, 0], matrix[1, 1]
+        if u01 == 0 and u10 == 0:
+            # 대각 게이트: 위상만 곱함
+            touched = 0
+            if u00 != 1:
+                a0 *= u00
+                touched += a0.size
+            if u11 != 1:
+                a1 *= u11
+                touched += a1.size
+            return touched
+        if u00 == 0 and u11 == 0:
+            # 반대각 게이트 (X 계열): 두 진폭을 교환
+            tmp = a0.copy()
+            np.multiply(a1, u01, out=a0)
+            np.multiply(tmp, u10, out=a1)
+        else:
+            tmp = a0.copy()
+            a0 *= u00
+            a0 += u01 * a1
+            a1 *= u11
+            a1 += u10 * tmp
+        return a0.size + a1.size
+
+    # 단일 큐비트 게이트 적용
+    def apply_gate(self, matrix, qubit):
+        matrix = np.asarray(matrix, dtype=self.dtype)
+        view, rest = self._split_view((qubit,))
+
+        def apply(block):
+            return self._apply_2x2(matrix, view[self._index(block, (0,))], view[self._index(block, (1,))])
+
+        self._finish_gate(self._for_each_block(rest, apply))
+
+    # 제어 게이트 적용 (control이 |1>인 부분 공간에서만 target에 matrix 적용)
+    def apply_controlled_gate(self, matrix, control, target):
+        matrix = np.asarray(matrix, dtype=self.dtype)
+        view, rest = self._split_view((control, target))
+        bits0, bits1 = ((1, 0), (1, 1)) if control < target else ((0, 1), (1, 1))
+
+        def apply(block):
+            return self._apply_2x2(matrix, view[self._index(block, bits0)], view[self._index(block, bits1)])
+
+        self._finish_gate(self._for_each_block(rest, apply))
+
+    # 일반 2큐비트 게이트 적용 (행렬 기저 순서는 |q1 q2>)
+    def apply_two_qubit_gate(self, matrix, q1, q2):
+        self.apply_unitary(matrix, (q1, q2))
+
+    # k큐비트 게이트 적용 (행렬 기저 순서는 |qubits[0] qubits[1] ...>)
+    def apply_unitary(self, matrix, qubits):
+        qubits = tuple(qubits)
+        if len(qubits) == 1:
+            self.apply_gate(matrix, qubits[0])
+            return
+        matrix = np.asarray(matrix, dtype=self.dtype)
+        k = len(qubits)
+        view, rest = self._split_view(qubits)
+        order = np.argsort(qubits)
+        basis = []
+        for state in range(2 ** k):
+            bits = [(state >> (k - 1 - j)) & 1 for j in range(k)]
+            basis.append(tuple(bits[j] for j in order))
+
+        def apply(block):
+            amps = [view[self._index(block, bits)] for bits in basis]
+            old = [a.copy() for a in amps]
+            for r in range(2 ** k):
+                amps[r][...] = 0
+                for c in range(2 ** k):
+                    if matrix[r, c] != 0:
+                        amps[r] += matrix[r, c] * old[c]
+            return (2 ** k) * amps[0].size
+
+        self._finish_gate(self._for_each_block(rest, apply))
+
+    # (이름, 큐비트...) 튜플 목록으로 된 회로 실행 (융합된 게이트는 ("unitary", 행렬, 큐비트...))
+    def run(self, gates):
+        for name, *qubits in gates:
+            if name == "unitary":
+                matrix, *qubits = qubits
+                self.apply_unitary(matrix, qubits)
+            elif name == "cnot":
+                self.cnot(*qubits)
+            elif name == "cz":
+                self.apply_controlled_gate(GATES["z"], *qubits)
+            elif name == "ccx":
+                self.apply_unitary(CCX_GATE, qubits)
+            elif name in GATES:
+                self.apply_gate(GATES[name], *qubits)
+            else:
+                raise ValueError(f"unknown gate '{name}'")
+        return self
+
+    def x(self, qubit):
+        self.apply_gate(X_GATE, qubit)
+
+    def h(self, qubit):
+        self.apply_gate(H_GATE, qubit)
+
+    def cnot(self, control, target):
+        self.apply_controlled_gate(X_GATE, control, target)
+
+    # 계산 기저별 측정 확률
+    def probabilities(self):
+        return np.abs(self.data) ** 2
+
+    # 노름 (정밀도와 관계없이 float64로 블록 단위 누적)
+    def norm(self):
+        total = 0.0
+        for start in range(0, self.data.size, self.chunk_size):
+            block = self.data[start:start + self.chunk_size]
+            total += float(np.sum(block.real ** 2 + block.imag ** 2, dtype=np.float64))
+        return math.sqrt(total)
+
+    # 현재까지 누적된 노름 오차 |노름 - 1|를 계산해 기록
+    def norm_drift(self):
+        drift = abs(self.norm() - 1)
+        self.norm_history.append((self.gate_count, drift))
+        self.max_norm_drift = max(self.max_norm_drift, drift)
+        return drift
+
+    # 특정 큐비트가 |1>로 측정될 확률
+    def qubit_probability(self, qubit):
+        view, _ = self._split_view((qubit,))
+        one = view[:, 1, :]
+        return float(np.vdot(one, one).real)
+
+    # 모든 큐비트의 축약 밀도 행렬 (n, 2, 2)을 상태를 한 번 훑으며 계산
+    # 2^c 크기 블록마다 블록 안에서 짝이 맞는 아래쪽 c개 큐비트는 블록 내부 내적으로,
+    # 짝이 다른 블록에 있는 위쪽 큐비트는 블록 전체 가중치와 짝 블록과의 내적으로 누적
+    def reduced_density_matrices(self):
+        n = self.num_qubits
+        c = min(n, max(1, self.chunk_size.bit_length() - 1))
+        size = 2 ** c
+        rho = np.zeros((n, 2, 2), dtype=np.complex128)
+        for j in range(2 ** (n - c)):
+            block = self.data[j * size:(j + 1) * size]
+            for q in range(n - c, n):
+                view = block.reshape(2 ** (q - n + c), 2, -1)
+                a0, a1 = view[:, 0, :], view[:, 1, :]
+                rho[q, 0, 0] += np.vdot(a0, a0).real
+                rho[q, 1, 1] += np.vdot(a1, a1).real
+                rho[q, 0, 1] += np.vdot(a1, a0)
+            weight = np.vdot(block, block).real
+            for q in range(n - c):
+                shift = n - 1 - q - c
+                bit = (j >> shift) & 1
+                rho[q, bit, bit] += weight
+                if bit == 0:
+                    partner = j | (1 << shift)
+                    rho[q, 0, 1] += np.vdot(self.data[partner * size:(partner + 1) * size], block)
+        rho[:, 1, 0] = rho[:, 0, 1].conj()
+        return rho
+
+    # 큐비트별 블로흐 벡터 (n, 3): rho = (I + xX + yY + zZ) / 2
+    # 길이가 1이면 순수 상태, 1보다 짧으면 다른 큐비트와 얽혀 있음
+    def bloch_vectors(self):
+        rho = self.reduced_density_matrices()
+        return np.stack([2 * rho[..., 0, 1].real, -2 * rho[..., 0, 1].imag, (rho[..., 0, 0] - rho[..., 1, 1]).real], axis=-1) + 0.0  # -0.0 제거
+
+    # 계산 기저 상태이면 그 인덱스를, 중첩 상태이면 None을 반환
+    def basis_index(self, atol=None):
+        atol = self.tolerance if atol is None else atol
+        index = int(np.argmax(np.abs(self.data)))
+        if abs(abs(self.data[index]) - 1) <= atol:
+            return index
+        return None
+
+    # 인덱스를 |q0 q1 ...> 형태의 문자열로 변환
+    def label(self, index):
+        return f"|{index:0{self.num_qubits}b}>"
+
+
+# 이름으로 참조하는 단일 큐비트 게이트 (회로 목록에서 사용)
+GATES = {
+    "x": X_GATE,
+    "y": np.array([[0, -1j], [1j, 0]], dtype=np.complex128),
+    "z": np.array([[1, 0], [0, -1]], dtype=np.complex128),
+    "h": H_GATE,
+    "s": np.array([[1, 0], [0, 1j]], dtype=np.complex128),
+    "sdg": np.array([[1, 0], [0, -1j]], dtype=np.complex128),
+    "t": np.array([[1, 0], [0, np.exp(1j * np.pi / 4)]], dtype=np.complex128),
+    "tdg": np.array([[1, 0], [0, np.exp(-1j * np.pi / 4)]], dtype=np.complex128),
+}
+# 안정자(클리퍼드) 시뮬레이터가 처리할 수 있는 게이트
+CLIFFORD_GATES = {"x", "y", "z", "h", "s", "sdg", "cnot", "cz"}
+
+_WORD = np.dtype("<u8")  # 비트 묶음 단위 (64비트, 리틀 엔디언)
+_ONES = np.array(~np.uint64(0), dtype=_WORD)
+
+
+# bool 배열(마지막 축)을 64비트 워드 배열로 묶음
+def _pack_bits(bits):
+    bits = np.asarray(bits, dtype=bool)
+    packed = np.packbits(bits, axis=-1, bitorder="little")
+    pad = (-packed.shape[-1]) % 8
+    if pad:
+        packed = np.concatenate([packed, np.zeros(packed.shape[:-1] + (pad,), dtype=np.uint8)], axis=-1)
+    return np.ascontiguousarray(packed).view(_WORD)
+
+
+# 64비트 워드 배열(마지막 축)을 길이 count의 0/1 배열로 풂
+def _unpack_bits(words, count):
+    words = np.ascontiguousarray(words, dtype=_WORD)
+    return np.unpackbits(words.view(np.uint8), axis=-1, count=count, bitorder="little")
+
+
+# 워드별 1 비트 개수
+def _popcount(words):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    bytes_ = np.ascontiguousarray(words).view(np.uint8)
+    return table[bytes_].reshape(words.shape + (8,)).sum(axis=-1)
+
+
+# 파울리 곱 P1*P2에서 생기는 i의 지수를 +1/-1 비트마스크로 계산 (Aaronson-Gottesman의 g 함수)
+def _pauli_phase_masks(x1, z1, x2, z2):
+    y1, xo1, zo1 = x1 & z1, x1 & ~z1, ~x1 & z1
+    plus = (y1 & z2 & ~x2) | (xo1 & z2 & x2) | (zo1 & x2 & ~z2)
+    minus = (y1 & x2 & ~z2) | (xo1 & z2 & ~x2) | (zo1 & x2 & z2)
+    return plus, minus
+
+
+# 안정자 테이블(Clifford tableau) 시뮬레이터 정의
+# 행 0..n-1은 파괴안정자(destabilizer), 행 n..2n-1은 안정자이며,
+# x, z는 큐비트별로 모든 행의 비트를 64비트 워드에 묶어 저장하므로 게이트 하나가 워드 단위 XOR 몇 번으로 끝남
+class StabilizerState:
+    def __init__(self, num_qubits):
+        if num_qubits < 1:
+            raise ValueError("num_qubits must be at least 1")
+        self.num_qubits = num_qubits
+        self.num_rows = 2 * num_qubits
+        words = (self.num_rows + 63) // 64
+        self.x_bits = np.zeros((num_qubits, words), dtype=_WORD)
+        self.z_bits = np.zeros((num_qubits, words), dtype=_WORD)
+        self.signs = np.zeros(words, dtype=_WORD)  # 행별 부호 비트
+        self.reset()
+
+    # |00...0> 상태로 초기화 (파괴안정자 X_j, 안정자 Z_j)
+    def reset(self):
+        n = self.num_qubits
+        self.x_bits[:] = 0
+        self.z_bits[:] = 0
+        self.signs[:] = 0
+        rows = np.arange(n)
+        self.x_bits[rows, rows >> 6] = np.left_shift(np.uint64(1), (rows & 63).astype(np.uint64))
+        stab = rows + n
+        self.z_bits[rows, stab >> 6] = np.left_shift(np.uint64(1), (stab & 63).astype(np.uint64))
+
+    def _check(self, *qubits):
+        for q in qubits:
+            if not 0 <= q < self.num_qubits:
+                raise ValueError(f"qubit index {q} out of range for {self.num_qubits} qubits")
+        if len(set(qubits)) != len(qubits):
+            raise ValueError("target qubits must be distinct")
+
+    def h(self, qubit):
+        self._check(qubit)
+        self.signs ^= self.x_bits[qubit] & self.z_bits[qubit]
+        self.x_bits[qubit], self.z_bits[qubit] = self.z_bits[qubit].copy(), self.x_bits[qubit].copy()
+
+    def s(self, qubit):
+        self._check(qubit)
+        self.signs ^= self.x_bits[qubit] & self.z_bits[qubit]
+        self.z_bits[qubit] ^= self.x_bits[qubit]
+
+    def sdg(self, qubit):
+        self.z(qubit)
+        self.s(qubit)
+
+    def x(self, qubit):
+        self._check(qubit)
+        self.signs ^= self.z_bits[qubit]
+
+    def y(self, qubit):
+        self._check(qubit)
+        self.signs ^= self.x_bits[qubit] ^ self.z_bits[qubit]
+
+    def z(self, qubit):
+        self._check(qubit)
+        self.signs ^= self.x_bits[qubit]
+
+    def cnot(self, control, target):
+        self._check(control, target)
+        xc, zc, xt, zt = self.x_bits[control], self.z_bits[control], self.x_bits[target], self.z_bits[target]
+        self.signs ^= xc & zt & ~(xt ^ zc)
+        xt ^= xc
+        zc ^= zt
+
+    def cz(self, control, target):
+        self.h(target)
+        self.cnot(control, target)
+        self.h(target)
+
+    # (이름, 큐비트...) 튜플 목록으로 된 회로 실행
+    def run(self, gates):
+        ops = {"x": self.x, "y": self.y, "z": self.z, "h": self.h, "s": self.s,
+               "sdg": self.sdg, "cnot": self.cnot, "cz": self.cz}
+        for name, *qubits in gates:
+            if name not in ops:
+                raise ValueError(f"gate '{name}' is not a Clifford gate")
+            ops[name](*qubits)
+        return self
+
+    # i번째 행을 (x, z, 부호) 형태의 bool 배열로 추출
+    def _row(self, i):
+        word, bit = divmod(int(i), 64)
+        shift = np.uint64(bit)
+        xs = ((self.x_bits[:, word] >> shift) & np.uint64(1)).astype(bool)
+        zs = ((self.z_bits[:, word] >> shift) & np.uint64(1)).astype(bool)
+        sign = bool((self.signs[word] >> shift) & np.uint64(1))
+        return xs, zs, sign
+
+    def _set_row(self, i, xs, zs, sign):
+        word, bit = divmod(int(i), 64)
+        mask = np.uint64(1) << np.uint64(bit)
+        self.x_bits[:, word] = np.where(xs, self.x_bits[:, word] | mask, self.x_bits[:, word] & ~mask)
+        self.z_bits[:, word] = np.where(zs, self.z_bits[:, word] | mask, self.z_bits[:, word] & ~mask)
+        self.signs[word] = (self.signs[word] | mask) if sign else (self.signs[word] & ~mask)
+
+    # mask로 선택한 모든 행에 p번째 행을 곱함 (부호 포함, 선택된 행에 대해 벡터화)
+    def _rowsum_rows(self, mask, p):
+        xp, zp, rp = self._row(p)
+        support = np.flatnonzero(xp | zp)
+        if support.size == 0:
+            return
+        xs, zs = self.x_bits[support], self.z_bits[support]
+        x1 = np.where(xp[support], _ONES, 0).astype(_WORD)[:, None]
+        z1 = np.where(zp[support], _ONES, 0).astype(_WORD)[:, None]
+        plus, minus = _pauli_phase_masks(x1, z1, xs, zs)
+        g = (_unpack_bits(plus, self.num_rows).sum(axis=0, dtype=np.int64)
+             - _unpack_bits(minus, self.num_rows).sum(axis=0, dtype=np.int64))
+        r = _unpack_bits(self.signs, self.num_rows).astype(np.int64)
+        total = (2 * r + 2 * rp + g) % 4
+        self.signs = _pack_bits(np.where(mask, total == 2, r.astype(bool)))
+
+        packed_mask = _pack_bits(mask)
+        self.x_bits[support[xp[support]]] ^= packed_mask
+        self.z_bits[support[zp[support]]] ^= packed_mask
+
+    # 계산 기저로 큐비트 하나를 측정하고 상태를 붕괴시킴
+    def measure(self, qubit, rng=None):
+        self._check(qubit)
+        rng = np.random.default_rng() if rng is None else rng
+        n = self.num_qubits
+        xa = _unpack_bits(self.x_bits[qubit], self.num_rows).astype(bool)
+        candidates = np.flatnonzero(xa[n:])
+
+        if candidates.size:
+            # 결과가 무작위인 경우
+            p = n + int(candidates[0])
+            mask = xa.copy()
+            mask[p] = False
+            self._rowsum_rows(mask, p)
+            xs, zs, sign = self._row(p)
+            self._set_row(p - n, xs, zs, sign)
+            outcome = int(rng.integers(2))
+            z_row = np.zeros(n, dtype=bool)
+            z_row[qubit] = True
+            self._set_row(p, np.zeros(n, dtype=bool), z_row, bool(outcome))
+            return outcome
+
+        # 결과가 결정된 경우: 해당 안정자들의 곱의 부호가 측정값
+        sx = np.zeros(n, dtype=bool)
+        sz = np.zeros(n, dtype=bool)
+        sign = 0
+        for i in np.flatnonzero(xa[:n]):
+            xs, zs, ri = self._row(n + i)
+            plus, minus = _pauli_phase_masks(xs, zs, sx, sz)
+            g = int(plus.sum()) - int(minus.sum())
+            sign = ((2 * sign + 2 * ri + g) % 4) // 2
+            sx ^= xs
+            sz ^= zs
+        return int(sign)
+
+    # 상태를 바꾸지 않고 모든 큐비트의 측정 결과를 shots번 추출 (shots x n 크기의 0/1 배열)
+    # 측정 결과는 x0 + span(X형 안정자)의 아핀 부분공간 위에서 균일 분포이므로 가우스 소거 한 번으로 구함
+    def sample(self, shots, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        n = self.num_qubits
+        bits_x = _unpack_bits(self.x_bits, self.num_rows)[:, n:].T
+        bits_z = _unpack_bits(self.z_bits, self.num_rows)[:, n:].T
+        X = _pack_bits(bits_x)
+        Z = _pack_bits(bits_z)
+        r = _unpack_bits(self.signs, self.num_rows)[n:].astype(bool)
+
+        def column(M, j, start):
+            word, bit = divmod(j, 64)
+            return np.flatnonzero((M[start:, word] >> np.uint64(bit)) & np.uint64(1)) + start
+
+        def swap(i, k):
+            if i != k:
+                X[[i, k]] = X[[k, i]]
+                Z[[i, k]] = Z[[k, i]]
+                r[[i, k]] = r[[k, i]]
+
+        # 1) X 부분에 대한 소거 (부호 추적 포함)
+        rank = 0
+        for j in range(n):
+            if rank == n:
+                break
+            hits = column(X, j, rank)
+            if hits.size == 0:
+                continue
+            swap(rank, int(hits[0]))
+            targets = column(X, j, rank + 1)
+            if targets.size:
+                plus, minus = _pauli_phase_masks(X[rank], Z[rank], X[targets], Z[targets])
+                g = (_popcount(plus).sum(axis=1, dtype=np.int64)
+                     - _popcount(minus).sum(axis=1, dtype=np.int64))
+                total = (2 * r[targets] + 2 * r[rank] + g) % 4
+                r[targets] = total == 2
+                X[targets] ^= X[rank]
+                Z[targets] ^= Z[rank]
+            rank += 1
+
+        # 2) 남은 Z형 안정자로 패리티 방정식을 풀어 기준 결과 x0를 구함 (전진 소거 후 역대입)
+        pivots = []
+        pivot_row = rank
+        for j in range(n):
+            if pivot_row == n:
+                break
+            hits = column(Z, j, pivot_row)
+            if hits.size == 0:
+                continue
+            swap(pivot_row, int(hits[0]))
+            targets = column(Z, j, pivot_row + 1)
+            Z[targets] ^= Z[pivot_row]
+            r[targets] ^= r[pivot_row]
+            pivots.append(j)
+            pivot_row += 1
+        x0 = np.zeros(Z.shape[1], dtype=_WORD)
+        for i in range(pivot_row - 1, rank - 1, -1):
+            j = pivots[i - rank]
+            parity = int(_popcount(Z[i] & x0).sum()) & 1
+            if parity != r[i]:
+                x0[j >> 6] |= np.uint64(1) << np.uint64(j & 63)
+
+        # 3) X형 안정자의 무작위 조합을 x0에 더함
+        out = np.repeat(x0[None, :], shots, axis=0)
+        choices = rng.integers(0, 2, size=(rank, shots), dtype=np.uint8).astype(bool)
+        for i in range(rank):
+            out[choices[i]] ^= X[i]
+        return _unpack_bits(out, n)
+
+    # 안정자 생성자를 "+XZ" 같은 문자열 목록으로 반환
+    def stabilizers(self):
+        labels = np.array(["I", "X", "Z", "Y"])
+        result = []
+        for i in range(self.num_qubits, self.num_rows):
+            xs, zs, sign = self._row(i)
+            result.append(("-" if sign else "+") + "".join(labels[xs.astype(int) + 2 * zs.astype(int)]))
+        return result
+
+
+# 상태 벡터로 담을 수 있는 최대 큐비트 수 (이보다 넓은 비클리퍼드 회로는 희소 상태로 실행)
+MAX_DENSE_QUBITS = 30
+
+
+# 희소 상태 표현 정의
+# 0이 아닌 진폭만 정렬된 (기저 인덱스, 진폭) 배열로 저장하고, 게이트는 인덱스 비트 연산으로 벡터화해 적용
+# 0이 아닌 진폭 비율이 density_threshold를 넘으면 StateVector로 전환하고 이후 연산은 그쪽에 맡김
+class SparseState:
+    run = StateVector.run
+
+    def __init__(self, num_qubits, dtype=np.complex128, density_threshold=0.125):
+        if not 1 <= num_qubits <= 64:
+            raise ValueError("num_qubits must be within [1, 64]")
+        self.num_qubits = num_qubits
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in PRECISIONS.values():
+            raise ValueError(f"dtype must be one of {list(PRECISIONS)}")
+        self.tolerance = float(np.sqrt(np.finfo(self.dtype).eps))
+        self.prune = float(np.finfo(self.dtype).eps)  # 이보다 작은 진폭은 상쇄된 것으로 보고 제거
+        self.density_threshold = density_threshold
+        self.version = 0
+        self.reset()
+
+    # |00...0> 상태로 초기화
+    def reset(self):
+        self.indices = np.zeros(1, dtype=np.uint64)
+        self.amplitudes = np.ones(1, dtype=self.dtype)
+        self.dense = None  # 밀집 상태로 전환된 경우의 StateVector
+        self.version += 1
+
+    # 0이 아닌 진폭의 비율
+    @property
+    def density(self):
+        if self.dense is not None:
+            return 1.0
+        return self.indices.size / 2.0 ** self.num_qubits
+
+    def _mask(self, qubit):
+        if not 0 <= qubit < self.num_qubits:
+            raise ValueError(f"qubit index {qubit} out of range for {self.num_qubits} qubits")
+        return np.uint64(1) << np.uint64(self.num_qubits - 1 - qubit)
+
+    # qubits에 작용하는 2^k x 2^k 행렬 적용 (행렬 기저는 |qubits[0] qubits[1] ...>)
+    def _apply_matrix(self, matrix, qubits):
+        if len(set(qubits)) != len(qubits):
+            raise ValueError("target qubits must be distinct")
+        k = len(qubits)
+        masks = [self._mask(q) for q in qubits]
+        full = np.bitwise_or.reduce(np.array(masks, dtype=np.uint64))
+        offsets = np.array([sum((int(m) for j, m in enumerate(masks) if (s >> (k - 1 - j)) & 1), 0)
+                            for s in range(2 ** k)], dtype=np.uint64)
+
+        # 각 진폭의 대상 비트 값(sub)과 나머지 비트(base)로 분해
+        sub = np.zeros(self.indices.size, dtype=np.intp)
+        for j, m in enumerate(masks):
+            sub |= ((self.indices & m) != 0).astype(np.intp) << (k - 1 - j)
+        base = self.indices & ~full
+
+        nonzero = matrix != 0
+        if np.all(nonzero.sum(axis=0) == 1) and np.all(nonzero.sum(axis=1) == 1):
+            # 치환+위상 게이트 (X, CNOT, Z, S, T 등): 인덱스만 바꾸고 진폭에 위상을 곱함
+            rows = np.argmax(nonzero, axis=0)
+            phases = matrix[rows, np.arange(2 ** k)]
+            amplitudes = self.amplitudes * phases[sub]
+            if np.array_equal(rows, np.arange(2 ** k)):
+                self.amplitudes = amplitudes
+                return
+            indices = base | offsets[rows[sub]]
+        else:
+            # 일반 게이트: 같은 base를 공유하는 진폭끼리 모아 작은 행렬 곱으로 처리
+            bases, inverse = np.unique(base, return_inverse=True)
+            grouped = np.zeros((bases.size, 2 ** k), dtype=self.dtype)
+            grouped[inverse, sub] = self.amplitudes
+            amplitudes = (grouped @ matrix.T).ravel()
+            indices = (bases[:, None] | offsets[None, :]).ravel()
+            keep = np.abs(amplitudes) > self.prune
+            indices, amplitudes = indices[keep], amplitudes[keep]
+
+        order = np.argsort(indices, kind="stable")
+        self.indices = indices[order]
+        self.amplitudes = amplitudes[order]
+        if self.indices.size > self.density_threshold * 2.0 ** self.num_qubits and self.num_qubits <= MAX_DENSE_QUBITS:
+            self._to_dense()
+
+    # 밀집 상태 벡터로 전환
+    def _to_dense(self):
+        dense = StateVector(self.num_qubits, dtype=self.dtype)
+        dense.data[0] = 0
+        dense.data[self.indices.astype(np.intp)] = self.amplitudes
+        self.dense = dense
+        self.indices = self.amplitudes = None
+
+    def apply_gate(self, matrix, qubit):
+        if self.dense is not None:
+            self.dense.apply_gate(matrix, qubit)
+        else:
+            self._apply_matrix(np.asarray(matrix, dtype=self.dtype), (qubit,))
+        self.version += 1
+
+    def apply_controlled_gate(self, matrix, control, target):
+        if self.dense is not None:
+            self.dense.apply_controlled_gate(matrix, control, target)
+        else:
+            full = np.eye(4, dtype=self.dtype)
+            full[2:, 2:] = matrix
+            self._apply_matrix(full, (control, target))
+        self.version += 1
+
+    def apply_two_qubit_gate(self, matrix, q1, q2):
+        self.apply_unitary(matrix, (q1, q2))
+
+    def apply_unitary(self, matrix, qubits):
+        if self.dense is not None:
+            self.dense.apply_unitary(matrix, qubits)
+        else:
+            self._apply_matrix(np.asarray(matrix, dtype=self.dtype), tuple(qubits))
+        self.version += 1
+
+    def x(self, qubit):
+        self.apply_gate(X_GATE, qubit)
+
+    def h(self, qubit):
+        self.apply_gate(H_GATE, qubit)
+
+    def cnot(self, control, target):
+        self.apply_controlled_gate(X_GATE, control, target)
+
+    # 0이 아닌 (기저 인덱스, 진폭) 배열
+    def nonzero(self):
+        if self.dense is not None:
+            indices = np.flatnonzero(self.dense.data).astype(np.uint64)
+            return indices, self.dense.data[indices.astype(np.intp)]
+        return self.indices, self.amplitudes
+
+    # 기저 인덱스 하나의 진폭
+    def amplitude(self, index):
+        indices, amplitudes = self.nonzero()
+        pos = np.searchsorted(indices, np.uint64(index))
+        if pos < indices.size and indices[pos] == index:
+            return amplitudes[pos]
+        return self.dtype.type(0)
+
+    # 전체 확률 배열 (MAX_DENSE_QUBITS 이하에서만 가능)
+    def probabilities(self):
+        if self.dense is not None:
+            return self.dense.probabilities()
+        if self.num_qubits > MAX_DENSE_QUBITS:
+            raise ValueError("state is too wide for a dense probability array; use nonzero() or sample()")
+        probs = np.zeros(2 ** self.num_qubits, dtype=np.abs(self.amplitudes).dtype)
+        probs[self.indices.astype(np.intp)] = np.abs(self.amplitudes) ** 2
+        return probs
+
+    def norm(self):
+        if self.dense is not None:
+            return self.dense.norm()
+        return math.sqrt(float(np.sum(np.abs(self.amplitudes) ** 2, dtype=np.float64)))
+
+    def qubit_probability(self, qubit):
+        indices, amplitudes = self.nonzero()
+        ones = (indices & self._mask(qubit)) != 0
+        return float(np.sum(np.abs(amplitudes[ones]) ** 2, dtype=np.float64))
+
+    def basis_index(self, atol=None):
+        atol = self.tolerance if atol is None else atol
+        indices, amplitudes = self.nonzero()
+        pos = int(np.argmax(np.abs(amplitudes)))
+        if abs(abs(amplitudes[pos]) - 1) <= atol:
+            return int(indices[pos])
+        return None
+
+    def label(self, index):
+        return f"|{index:0{self.num_qubits}b}>"
+
+    # 측정 결과(기저 인덱스, uint64)를 shots개 추출 (0이 아닌 진폭 위의 샘플러를 상태 버전별로 재사용)
+    def sample(self, shots, rng=None):
+        cached = getattr(self, "_sampler", None)
+        if cached is None or cached[0] != self.version:
+            indices, amplitudes = self.nonzero()
+            cached = self._sampler = (self.version, indices, Sampler(np.abs(amplitudes) ** 2))
+        _, indices, sampler = cached
+        return indices[sampler.sample(shots, rng)]
+
+    # 측정된 기저 인덱스와 횟수를 (indices, counts) 배열로 반환 (0회인 기저는 생략)
+    def histogram(self, shots, rng=None):
+        return np.unique(self.sample(shots, rng), return_counts=True)
+
+
+# 두 이웃 큐비트를 맞바꾸는 SWAP 게이트 (MPS에서 떨어진 큐비트를 이웃으로 옮길 때 사용)
+SWAP_GATE = np.eye(4, dtype=np.complex128)[[0, 2, 1, 3]]
+
+
+# 행렬 곱 상태(MPS) 표현 정의
+# 큐비트마다 (왼쪽 결합, 2, 오른쪽 결합) 텐서를 두고, 다중 큐비트 게이트는 이웃한 텐서를 합쳐 적용한 뒤 SVD로 다시 나눔
+# 결합 차원은 max_bond 이하로, 상대 크기(특잇값 제곱 비율)가 cutoff 미만인 특잇값은 잘라내며 버린 가중치를 truncation_error에 누적
+# 직교 중심(center)을 유지해 잘라내기가 최적이 되게 하고, 떨어진 큐비트는 SWAP으로 이웃하게 옮긴 뒤 되돌림
+class MPSState:
+    run = StateVector.run
+
+    def __init__(self, num_qubits, max_bond=64, cutoff=1e-12, dtype=np.complex128):
+        if num_qubits < 1:
+            raise ValueError("num_qubits must be at least 1")
+        if max_bond < 1:
+            raise ValueError("max_bond must be at least 1")
+        self.num_qubits = num_qubits
+        self.max_bond = max_bond
+        self.cutoff = cutoff
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in PRECISIONS.values():
+            raise ValueError(f"dtype must be one of {list(PRECISIONS)}")
+        self.tolerance = float(np.sqrt(np.finfo(self.dtype).eps))
+        self.version = 0
+        self.reset()
+
+    # |00...0> 상태로 초기화 (결합 차원 1인 곱 상태)
+    def reset(self):
+        self.tensors = []
+        for _ in range(self.num_qubits):
+            tensor = np.zeros((1, 2, 1), dtype=self.dtype)
+            tensor[0, 0, 0] = 1
+            self.tensors.append(tensor)
+        self.center = 0
+        self.truncation_error = 0.0  # 잘라낸 특잇값 제곱 비율의 합
+        self.fidelity = 1.0  # 잘라내기마다 (1 - 버린 가중치)를 곱한 충실도 추정값
+        self.version += 1
+
+    def _check(self, qubits):
+        for q in qubits:
+            if not 0 <= q < self.num_qubits:
+                raise ValueError(f"qubit index {q} out of range for {self.num_qubits} qubits")
+        if len(set(qubits)) != len(qubits):
+            raise ValueError("target qubits must be distinct")
+
+    # 직교 중심을 site로 이동 (QR 분해로 지나가는 텐서를 왼쪽/오른쪽 정규형으로 만듦)
+    def _move_center(self, site):
+        while self.center < site:
+            tensor = self.tensors[self.center]
+            left, _, right = tensor.shape
+            q, r = np.linalg.qr(tensor.reshape(left * 2, right))
+            self.tensors[self.center] = q.reshape(left, 2, -1)
+            self.tensors[self.center + 1] = np.tensordot(r, self.tensors[self.center + 1], axes=(1, 0))
+            self.center += 1
+        while self.center > site:
+            tensor = self.tensors[self.center]
+            left, _, right = tensor.shape
+            q, r = np.linalg.qr(tensor.reshape(left, 2 * right).T.conj())
+            self.tensors[self.center] = q.T.conj().reshape(-1, 2, right)
+            self.tensors[self.center - 1] = np.tensordot(self.tensors[self.center - 1], r.T.conj(), axes=(2, 0))
+            self.center -= 1
+
+    # 특잇값 잘라내기: 남길 개수를 정하고 버린 가중치를 기록
+    def _truncate(self, s):
+        weights = s ** 2
+        total = float(weights.sum())
+        keep = max(1, min(self.max_bond, int(np.count_nonzero(weights > self.cutoff * total))))
+        discarded = float(weights[keep:].sum()) / total if total > 0 else 0.0
+        if discarded:
+            self.truncation_error += discarded
+            self.fidelity *= 1 - discarded
+        return keep
+
+    # 이웃한 k개 사이트(start..start+k-1)에 2^k x 2^k 행렬 적용 후 SVD로 다시 분해
+    def _apply_sites(self, matrix, start, k):
+        self._move_center(start)
+        theta = self.tensors[start]
+        for site in range(start + 1, start + k):
+            theta = np.tensordot(theta, self.tensors[site], axes=(theta.ndim - 1, 0))
+        left, right = theta.shape[0], theta.shape[-1]
+        theta = np.einsum("ij,ajb->aib", matrix, theta.reshape(left, 2 ** k, right))
+        for site in range(start, start + k - 1):
+            theta = theta.reshape(left * 2, -1)
+            u, s, vh = np.linalg.svd(theta, full_matrices=False)
+            keep = self._truncate(s)
+            s = s[:keep] / np.linalg.norm(s[:keep])
+            self.tensors[site] = u[:, :keep].reshape(left, 2, keep).astype(self.dtype, copy=False)
+            theta = (s[:, None] * vh[:keep]).astype(self.dtype, copy=False)
+            left = keep
+        self.tensors[start + k - 1] = theta.reshape(left, 2, right)
+        self.center = start + k - 1
+
+    def apply_gate(self, matrix, qubit):
+        self._check((qubit,))
+        matrix = np.asarray(matrix, dtype=self.dtype)
+        self.tensors[qubit] = np.einsum("ij,ajb->aib", matrix, self.tensors[qubit])
+        self.version += 1
+
+    def apply_controlled_gate(self, matrix, control, target):
+        full = np.eye(4, dtype=self.dtype)
+        full[2:, 2:] = matrix
+        self.apply_unitary(full, (control, target))
+
+    def apply_two_qubit_gate(self, matrix, q1, q2):
+        self.apply_unitary(matrix, (q1, q2))
+
+    # k큐비트 게이트 적용 (행렬 기저 순서는 |qubits[0] qubits[1] ...>)
+    def apply_unitary(self, matrix, qubits):
+        qubits = tuple(qubits)
+        if len(qubits) == 1:
+            self.apply_gate(matrix, qubits[0])
+            return
+        self._check(qubits)
+        k = len(qubits)
+        # 행렬 기저를 큐비트 번호 순서로 바꿈
+        order = list(np.argsort(qubits))
+        matrix = np.asarray(matrix, dtype=self.dtype).reshape([2] * (2 * k))
+        matrix = matrix.transpose(order + [k + j for j in order]).reshape(2 ** k, 2 ** k)
+        # 대상 큐비트를 가장 작은 번호 옆으로 차례로 옮김
+        targets = sorted(qubits)
+        swaps = []
+        for j, q in enumerate(targets[1:], 1):
+            for site in range(q - 1, targets[0] + j - 1, -1):
+                self._apply_sites(SWAP_GATE.astype(self.dtype), site, 2)
+                swaps.append(site)
+        self._apply_sites(matrix, targets[0], k)
+        for site in reversed(swaps):
+            self._apply_sites(SWAP_GATE.astype(self.dtype), site, 2)
+        self.version += 1
+
+    def x(self, qubit):
+        self.apply_gate(X_GATE, qubit)
+
+    def h(self, qubit):
+        self.apply_gate(H_GATE, qubit)
+
+    def cnot(self, control, target):
+        self.apply_controlled_gate(X_GATE, control, target)
+
+    # 결합 차원 목록 (이웃한 큐비트 사이 n-1개)
+    def bond_dimensions(self):
+        return [tensor.shape[2] for tensor in self.tensors[:-1]]
+
+    # 텐서가 차지하는 메모리 (바이트)
+    @property
+    def nbytes(self):
+        return sum(tensor.nbytes for tensor in self.tensors)
+
+    # 기저 인덱스 하나의 진폭 (큐비트 0이 가장 높은 비트, 64큐비트를 넘어도 파이썬 정수로 지정 가능)
+    def amplitude(self, index):
+        index = int(index)
+        vector = np.ones(1, dtype=self.dtype)
+        for q, tensor in enumerate(self.tensors):
+            vector = vector @ tensor[:, (index >> (self.num_qubits - 1 - q)) & 1, :]
+        return vector[0]
+
+    # 밀집 진폭 배열로 변환 (MAX_DENSE_QUBITS 이하에서만 가능)
+    def to_dense(self):
+        if self.num_qubits > MAX_DENSE_QUBITS:
+            raise ValueError("state is too wide for a dense array; use amplitude() or sample()")
+        data = self.tensors[0]
+        for tensor in self.tensors[1:]:
+            data = np.tensordot(data, tensor, axes=(data.ndim - 1, 0)).reshape(1, -1, tensor.shape[2])
+        return data.reshape(-1)
+
+    def probabilities(self):
+        return np.abs(self.to_dense()) ** 2
+
+    def norm(self):
+        return float(np.linalg.norm(self.tensors[self.center]))
+
+    # 특정 큐비트가 |1>로 측정될 확률 (직교 중심을 그 큐비트로 옮겨 국소적으로 계산)
+    def qubit_probability(self, qubit):
+        self._check((qubit,))
+        self._move_center(qubit)
+        tensor = self.tensors[qubit]
+        return float(np.vdot(tensor[:, 1, :], tensor[:, 1, :]).real) / self.norm() ** 2
+
+    def label(self, index):
+        return f"|{index:0{self.num_qubits}b}>"
+
+    # shots번 측정한 결과를 (shots x n) 비트 배열로 반환
+    # 직교 중심을 큐비트 0에 두면 오른쪽 텐서가 모두 정규형이므로, 앞 큐비트 결과에 대한 조건부 확률을
+    # 왼쪽 벡터의 노름만으로 구해 큐비트 0부터 순서대로 모든 샷을 한꺼번에 추출
+    def sample(self, shots, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        self._move_center(0)
+        bits = np.zeros((shots, self.num_qubits), dtype=np.uint8)
+        vectors = np.ones((shots, 1), dtype=self.dtype)
+        rows = np.arange(shots)
+        for q, tensor in enumerate(self.tensors):
+            branches = np.einsum("sa,apb->spb", vectors, tensor)
+            weights = np.sum(branches.real ** 2 + branches.imag ** 2, axis=2, dtype=np.float64)
+            totals = weights.sum(axis=1)
+            outcome = rng.random(shots) * totals >= weights[:, 0]
+            bits[:, q] = outcome
+            chosen = weights[rows, outcome.astype(np.intp)]
+            vectors = branches[rows, outcome.astype(np.intp)] / np.sqrt(chosen)[:, None].astype(self.dtype)
+        return bits
+
+
+# Toffoli(CCX) 게이트: 두 제어 큐비트가 모두 |1>이면 대상 반전
+CCX_GATE = np.eye(8, dtype=np.complex128)[[0, 1, 2, 3, 4, 5, 7, 6]]
+
+# 이름이 있는 다중 큐비트 게이트 행렬 (행렬 기저는 |제어... 대상>)
+MULTI_QUBIT_GATES = {
+    "cnot": CNOT_GATE,
+    "cz": np.diag([1, 1, 1, -1]).astype(np.complex128),
+    "ccx": CCX_GATE,
+}
+# 서로 역원인 게이트 쌍 (연속으로 오면 상쇄)
+INVERSE_GATES = {"x": "x", "y": "y", "z": "z", "h": "h", "cnot": "cnot", "cz": "cz", "ccx": "ccx",
+                 "s": "sdg", "sdg": "s", "t": "tdg", "tdg": "t"}
+
+
+# 게이트 튜플을 (이름, 행렬, 큐비트 튜플)로 분해
+def _gate_parts(gate):
+    name, *rest = gate
+    if name == "unitary":
+        matrix, *qubits = rest
+        return name, np.asarray(matrix, dtype=np.complex128), tuple(qubits)
+    if name in GATES:
+        return name, GATES[name], tuple(rest)
+    if name in MULTI_QUBIT_GATES:
+        return name, MULTI_QUBIT_GATES[name], tuple(rest)
+    raise ValueError(f"unknown gate '{name}'")
+
+
+# qubits에 작용하는 행렬을 support 전체(기저 |support[0] ...>)에 작용하는 행렬로 확장
+def _expand_matrix(matrix, qubits, support):
+    m, k = len(support), len(qubits)
+    if tuple(qubits) == tuple(support):
+        return matrix
+    positions = [support.index(q) for q in qubits]
+    others = [i for i in range(m) if i not in positions]
+    op = np.kron(matrix, np.eye(2 ** (m - k))).reshape([2] * (2 * m))
+    inverse = list(np.argsort(positions + others))
+    return op.transpose(inverse + [m + i for i in inverse]).reshape(2 ** m, 2 ** m)
+
+
+# 실행 전 회로 최적화
+# 1) 연속된 역원 쌍(H·H, X·X, CNOT·CNOT 등) 상쇄
+# 2) 지지 큐비트가 max_fused_qubits개 이하로 유지되는 인접 게이트들을 하나의 행렬로 융합
+#    (같은 선 위의 단일 큐비트 게이트는 2x2 하나로 합쳐지고, 서로 다른 선의 블록도 게이트가 이어 주면 합쳐짐:
+#     h0, h1, cnot01 -> 4x4 하나)
+# 융합되지 않고 하나만 남은 게이트는 이름 그대로 두어 백엔드의 빠른 경로를 유지
+def compile_gates(gates, max_fused_qubits=2):
+    # 1) 역원 쌍 상쇄: 선마다 아직 남아 있는 게이트 번호를 스택으로 관리
+    ops = [_gate_parts(gate) for gate in gates]
+    alive = [True] * len(ops)
+    stacks = {}
+    for i, (name, _, qubits) in enumerate(ops):
+        tops = {stacks[q][-1] if stacks.get(q) else None for q in qubits}
+        if len(tops) == 1:
+            top = tops.pop()
+            if (top is not None and ops[top][2] == qubits
+                    and INVERSE_GATES.get(ops[top][0]) == name):
+                alive[top] = alive[i] = False
+                for q in qubits:
+                    stacks[q].pop()
+                continue
+        for q in qubits:
+            stacks.setdefault(q, []).append(i)
+    ops = [op for op, keep in zip(ops, alive) if keep]
+
+    # 2) 융합: 게이트가 걸친 선들의 마지막 블록들을 게이트와 함께 하나로 합침
+    #    가장 늦은 블록 자리에 합치므로, 나머지 블록은 자기 모든 선에서 마지막이어야 함 (그 뒤에 같은 선을 쓰는
+    #    블록이 없어야 순서를 바꿔도 결과가 같음) - 이런 블록끼리는 선이 겹치지 않아 서로 교환함
+    blocks = []  # [이름, 행렬, 지지 큐비트 목록] (다른 블록에 합쳐진 자리는 None)
+    last = {}
+    for name, matrix, qubits in ops:
+        previous = sorted({last[q] for q in qubits if q in last})
+        if previous:
+            b = previous[-1]
+            movable = all(last[q] == p for p in previous[:-1] for q in blocks[p][2])
+            support = list(blocks[b][2])
+            for p in previous[:-1]:
+                support += blocks[p][2]
+            support += [q for q in qubits if q not in support]
+            if movable and len(support) <= max_fused_qubits:
+                current = _expand_matrix(blocks[b][1], blocks[b][2], support)
+                for p in previous[:-1]:
+                    current = _expand_matrix(blocks[p][1], blocks[p][2], support) @ current
+                    blocks[p] = None
+                blocks[b] = ["unitary", _expand_matrix(matrix, qubits, support) @ current, support]
+                for q in support:
+                    if q in qubits or last.get(q) in previous:
+                        last[q] = b
+                continue
+        blocks.append([name, matrix, list(qubits)])
+        for q in qubits:
+            last[q] = len(blocks) - 1
+
+    compiled = []
+    for name, matrix, support in filter(None, blocks):
+        if name != "unitary":
+            compiled.append((name, *support))
+        elif not np.allclose(matrix, np.eye(matrix.shape[0])):
+            compiled.append(("unitary", matrix, *support))
+    return compiled
+
+
+# 회로 정의: 게이트를 (이름, 큐비트...) 튜플로 기록하고 실행 전에 compile()로 최적화
+class Circuit:
+    def __init__(self, num_qubits, gates=()):
+        if num_qubits < 1:
+            raise ValueError("num_qubits must be at least 1")
+        self.num_qubits = num_qubits
+        self.gates = []
+        for gate in gates:
+            self.append(gate)
+
+    def append(self, gate):
+        name, _, qubits = _gate_parts(gate)
+        for q in qubits:
+            if not 0 <= q < self.num_qubits:
+                raise ValueError(f"qubit index {q} out of range for {self.num_qubits} qubits")
+        self.gates.append(tuple(gate))
+        return self
+
+    def __len__(self):
+        return len(self.gates)
+
+    def __iter__(self):
+        return iter(self.gates)
+
+    def x(self, qubit):
+        return self.append(("x", qubit))
+
+    def h(self, qubit):
+        return self.append(("h", qubit))
+
+    def cnot(self, control, target):
+        return self.append(("cnot", control, target))
+
+    def ccx(self, control1, control2, target):
+        return self.append(("ccx", control1, control2, target))
+
+    def unitary(self, matrix, *qubits):
+        return self.append(("unitary", matrix, *qubits))
+
+    def compile(self, max_fused_qubits=2):
+        return Circuit(self.num_qubits, compile_gates(self.gates, max_fused_qubits))
+
+    # 회로 실행: state를 주지 않으면 simulate()로 백엔드를 고름
+    def run(self, state=None, compile=True):
+        if state is None:
+            return simulate(self.num_qubits, self.gates, compile=compile)
+        return state.run(self.compile().gates if compile else self.gates)
+
+
+# 게이트의 역(수반) 게이트: 이름이 있는 게이트는 INVERSE_GATES, 유니터리는 켤레 전치
+def inverse_gate(gate):
+    name, *rest = gate
+    if name == "unitary":
+        matrix, *qubits = rest
+        return ("unitary", np.asarray(matrix, dtype=np.complex128).conj().T, *qubits)
+    if name not in INVERSE_GATES:
+        raise ValueError(f"unknown gate '{name}'")
+    return (INVERSE_GATES[name], *rest)
+
+
+# 체크포인트 사이의 게이트 수 (이 간격마다 전체 상태를 저장)
+CHECKPOINT_INTERVAL = 64
+
+
+# 상태 벡터의 되돌리기/다시 실행 기록
+# 적용한 게이트만 기록하고, 되돌릴 때는 상태를 복사해 두는 대신 역게이트를 제자리에서 적용
+# checkpoint_interval개 게이트마다 전체 상태를 체크포인트로 저장 (directory를 주면 np.save로 .npy 파일에 쓰고
+# 메모리 매핑으로 읽음) - seek()는 역게이트/게이트 적용과 체크포인트 한 번 + 게이트 interval/2개 이하 중 싼 쪽을 고름
+# 체크포인트는 역게이트를 거듭 적용하며 쌓이는 반올림 오차도 끊어 줌
+class GateHistory:
+    def __init__(self, state, checkpoint_interval=CHECKPOINT_INTERVAL, directory=None):
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be at least 1")
+        self.state = state
+        self.checkpoint_interval = checkpoint_interval
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.gates = []  # 기록된 게이트 (position 이후는 다시 실행할 수 있는 게이트)
+        self.position = 0  # 현재 상태 = 처음 상태에 gates[:position]을 적용한 상태
+        self.checkpoints = {}  # 위치 -> 상태 배열 또는 .npy 경로
+        self._checkpoint()
+
+    def __len__(self):
+        return len(self.gates)
+
+    # 지금까지 적용된(되돌리지 않은) 게이트
+    def applied(self):
+        return self.gates[:self.position]
+
+    def _checkpoint(self):
+        if self.directory is None:
+            self.checkpoints[self.position] = self.state.data.copy()
+        else:
+            path = os.path.join(self.directory, f"checkpoint_{id(self):x}_{self.position}.npy")
+            np.save(path, self.state.data)
+            self.checkpoints[self.position] = path
+
+    def _drop_checkpoints(self, after):
+        for position in [p for p in self.checkpoints if p > after]:
+            saved = self.checkpoints.pop(position)
+            if isinstance(saved, str) and os.path.exists(saved):
+                os.remove(saved)
+
+    def _load(self, position):
+        saved = self.checkpoints[position]
+        np.copyto(self.state.data, np.load(saved, mmap_mode="r") if isinstance(saved, str) else saved)
+        self.state.version += 1
+        self.position = position
+
+    # 게이트 목록을 적용하고 기록 (다시 실행할 게이트는 버림)
+    # 체크포인트 위치마다 끊어서 run(state, 게이트 목록)으로 실행 (기본은 state.run)
+    def extend(self, gates, run=None):
+        run = run if run is not None else (lambda state, segment: state.run(segment))
+        del self.gates[self.position:]
+        self._drop_checkpoints(self.position)
+        gates = list(gates)
+        start = 0
+        while start < len(gates):
+            size = min(len(gates) - start, self.checkpoint_interval - self.position % self.checkpoint_interval)
+            segment = gates[start:start + size]
+            run(self.state, segment)
+            self.gates.extend(segment)
+            self.position += size
+            start += size
+            if self.position % self.checkpoint_interval == 0:
+                self._checkpoint()
+        return self
+
+    def apply(self, gate):
+        return self.extend([gate])
+
+    # 마지막 게이트를 역게이트로 되돌림 (되돌릴 게 없으면 False)
+    def undo(self):
+        if self.position == 0:
+            return False
+        self.position -= 1
+        self.state.run([inverse_gate(self.gates[self.position])])
+        return True
+
+    # 되돌린 게이트를 다시 적용 (없으면 False)
+    def redo(self):
+        if self.position == len(self.gates):
+            return False
+        self.state.run([self.gates[self.position]])
+        self.position += 1
+        return True
+
+    # 기록의 임의 위치로 이동: 지금 위치에서 게이트로 가는 것과 가장 가까운 체크포인트를 읽고 가는 것 중 싼 쪽
+    # (체크포인트 읽기는 게이트 하나와 같은 비용으로 봄)
+    def seek(self, position):
+        if not 0 <= position <= len(self.gates):
+            raise ValueError(f"position must be within [0, {len(self.gates)}]")
+        checkpoint = min(self.checkpoints, key=lambda p: abs(p - position))
+        if 1 + abs(checkpoint - position) < abs(self.position - position):
+            self._load(checkpoint)
+        while self.position > position:
+            self.undo()
+        while self.position < position:
+            self.redo()
+        return self
+
+    # 기록을 지우고 상태를 |00...0>에서 다시 시작
+    def reset(self):
+        self.state.reset()
+        self.gates = []
+        self.position = 0
+        self._drop_checkpoints(-1)
+        self._checkpoint()
+
+
+# 배치 상태 벡터 정의
+# 여러 입력 상태를 (batch, 2^n) 배열 하나에 담아, 게이트 하나를 배치 전체에 대해 큰 NumPy 연산 몇 번으로 적용
+class BatchedStateVector(StateVector):
+    def __init__(self, num_qubits, batch_size, chunk_size=1 << 20, workers=None, parallel_threshold=1 << 18,
+                 dtype=np.complex128):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        super().__init__(num_qubits, chunk_size=chunk_size, workers=workers,
+                         parallel_threshold=parallel_threshold, dtype=dtype)
+        self.batch_size = batch_size
+        self.data = np.zeros((batch_size, 2 ** num_qubits), dtype=self.dtype)
+        self.data[:, 0] = 1  # 모든 배치 원소 |00...0>
+
+    def reset(self):
+        self.data[:] = 0
+        self.data[:, 0] = 1
+        self.version += 1
+
+    # 초기 상태 설정: 기저 인덱스 배열(batch,) 또는 진폭 배열(batch, 2^n)
+    def set_states(self, initial_states):
+        states = np.asarray(initial_states)
+        if states.ndim == 1:
+            if states.shape[0] != self.batch_size:
+                raise ValueError(f"expected {self.batch_size} basis indices, got {states.shape[0]}")
+            self.data[:] = 0
+            self.data[np.arange(self.batch_size), states.astype(np.intp)] = 1
+        elif states.shape == self.data.shape:
+            self.data[:] = states
+        else:
+            raise ValueError(f"initial states must have shape ({self.batch_size},) or {self.data.shape}")
+        self.version += 1
+
+    # 배치 원소별 노름 (batch,)
+    def norm(self):
+        return np.sqrt(np.sum(self.data.real ** 2 + self.data.imag ** 2, axis=1, dtype=np.float64))
+
+    def norm_drift(self):
+        drift = float(np.max(np.abs(self.norm() - 1)))
+        self.norm_history.append((self.gate_count, drift))
+        self.max_norm_drift = max(self.max_norm_drift, drift)
+        return drift
+
+    # 배치 원소별 계산 기저 측정 확률 (batch, 2^n)
+    def probabilities(self):
+        return self.data.real ** 2 + self.data.imag ** 2
+
+    # 배치 원소별로 특정 큐비트가 |1>로 측정될 확률 (batch,)
+    def qubit_probability(self, qubit):
+        view, _ = self._split_view((qubit,))
+        one = view[:, :, 1, :]
+        return np.sum(one.real ** 2 + one.imag ** 2, axis=(1, 2), dtype=np.float64)
+
+    # 배치 원소별 모든 큐비트의 축약 밀도 행렬 (batch, n, 2, 2) (bloch_vectors는 (batch, n, 3))
+    def reduced_density_matrices(self):
+        rho = np.zeros((self.batch_size, self.num_qubits, 2, 2), dtype=np.complex128)
+        for q in range(self.num_qubits):
+            view, _ = self._split_view((q,))
+            a0, a1 = view[:, :, 0, :], view[:, :, 1, :]
+            rho[:, q, 0, 0] = np.sum(a0.real ** 2 + a0.imag ** 2, axis=(1, 2), dtype=np.float64)
+            rho[:, q, 1, 1] = np.sum(a1.real ** 2 + a1.imag ** 2, axis=(1, 2), dtype=np.float64)
+            rho[:, q, 0, 1] = np.sum(a1.conj() * a0, axis=(1, 2), dtype=np.complex128)
+        rho[:, :, 1, 0] = rho[:, :, 0, 1].conj()
+        return rho
+
+    # 배치 원소별 계산 기저 상태 인덱스 (중첩 상태는 -1)
+    def basis_index(self, atol=None):
+        atol = self.tolerance if atol is None else atol
+        index = np.argmax(np.abs(self.data), axis=1)
+        peak = np.abs(self.data[np.arange(self.batch_size), index])
+        return np.where(np.abs(peak - 1) <= atol, index, -1)
+
+
+# 같은 회로를 여러 입력 상태에 한 번에 실행 (initial_states: 기저 인덱스 배열 또는 (batch, 2^n) 진폭 배열)
+def run_batch(circuit, initial_states, compile=True, dtype=np.complex128):
+    states = np.asarray(initial_states)
+    batch = BatchedStateVector(circuit.num_qubits, states.shape[0], dtype=dtype)
+    batch.set_states(states)
+    return batch.run(compile_gates(circuit.gates) if compile else circuit.gates)
+
+
+# 노이즈 모델 정의
+# gates에 속한 게이트가 끝날 때마다 그 게이트가 건드린 각 큐비트에 다음 채널을 차례로 적용
+#   depolarizing: 확률 p로 X, Y, Z 중 하나를 균등하게 적용
+#   bit_flip: 확률 p로 X 적용
+#   amplitude_damping: 감쇠율 gamma로 |1> -> |0> 붕괴 (Kraus 연산자 K0, K1)
+class NoiseModel:
+    def __init__(self, depolarizing=0.0, bit_flip=0.0, amplitude_damping=0.0, gates=("x", "h", "cnot")):
+        for name, value in (("depolarizing", depolarizing), ("bit_flip", bit_flip),
+                            ("amplitude_damping", amplitude_damping)):
+            if not 0 <= value <= 1:
+                raise ValueError(f"{name} must be within [0, 1]")
+        self.depolarizing = depolarizing
+        self.bit_flip = bit_flip
+        self.amplitude_damping = amplitude_damping
+        self.gates = set(gates)
+
+    # 노이즈가 전혀 없는지 확인
+    def is_ideal(self):
+        return self.depolarizing == 0 and self.bit_flip == 0 and self.amplitude_damping == 0
+
+
+# 확률적 궤적(Monte Carlo trajectory) 노이즈 시뮬레이터 정의
+# 4^n 밀도 행렬 대신 순수 상태 궤적 여러 개를 BatchedStateVector에 담아 실행하고,
+# 궤적마다 Kraus 분기를 난수 하나로 고른 뒤 확률과 관측량을 궤적 평균으로 계산
+# 궤적은 batch_size개씩 묶어 workers개 스레드에서 병렬로 실행하며, 묶음마다 seed에서 갈라진 독립 난수열을 사용
+class TrajectorySimulator:
+    def __init__(self, num_qubits, noise, trajectories=1000, batch_size=256, workers=None, seed=None,
+                 dtype=np.complex128):
+        if trajectories < 1:
+            raise ValueError("trajectories must be at least 1")
+        self.num_qubits = num_qubits
+        self.noise = noise
+        self.trajectories = trajectories
+        self.batch_size = min(batch_size, trajectories)
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.seed = seed
+        self.dtype = np.dtype(dtype)
+        self.version = 0  # 샘플러 캐시 무효화용
+        self._probabilities = None
+        self.expectations = {}  # 관측량 이름 -> (궤적 평균, 표준 오차)
+
+    # 궤적 묶음의 행(rows)에만 2x2 행렬을 적용하고, scale이 있으면 행마다 곱함
+    @staticmethod
+    def _apply_rows(batch, matrix, qubit, rows, scale=None):
+        if rows.size == 0:
+            return
+        view, _ = batch._split_view((qubit,))
+        amps = view[rows]
+        a0, a1 = amps[:, :, 0, :], amps[:, :, 1, :]
+        new0 = matrix[0, 0] * a0 + matrix[0, 1] * a1
+        new1 = matrix[1, 0] * a0 + matrix[1, 1] * a1
+        if scale is not None:
+            new0 *= scale[:, None, None]
+            new1 *= scale[:, None, None]
+        view[rows, :, 0, :] = new0
+        view[rows, :, 1, :] = new1
+
+    # 큐비트 하나에 노이즈 채널을 적용 (모든 궤적의 분기를 벡터화된 난수로 한 번에 추출)
+    def _apply_noise(self, batch, qubit, rng):
+        noise = self.noise
+        size = batch.batch_size
+        if noise.depolarizing:
+            hit = np.flatnonzero(rng.random(size) < noise.depolarizing)
+            pauli = rng.integers(0, 3, hit.size)
+            for k, name in enumerate(("x", "y", "z")):
+                self._apply_rows(batch, GATES[name], qubit, hit[pauli == k])
+        if noise.bit_flip:
+            self._apply_rows(batch, X_GATE, qubit, np.flatnonzero(rng.random(size) < noise.bit_flip))
+        if noise.amplitude_damping:
+            gamma = noise.amplitude_damping
+            p_jump = gamma * batch.qubit_probability(qubit)  # K1 분기 확률
+            jump = rng.random(size) < p_jump
+            rows = np.flatnonzero(jump)
+            k1 = np.array([[0, math.sqrt(gamma)], [0, 0]])
+            self._apply_rows(batch, k1, qubit, rows, 1 / np.sqrt(p_jump[rows]))
+            rows = np.flatnonzero(~jump)
+            k0 = np.array([[1, 0], [0, math.sqrt(1 - gamma)]])
+            self._apply_rows(batch, k0, qubit, rows, 1 / np.sqrt(np.maximum(1 - p_jump[rows], 1e-300)))
+
+    # 궤적 묶음 하나 실행: (확률 합, 관측량별 값 배열) 반환
+    def _run_batch(self, gates, size, rng, observables):
+        batch = BatchedStateVector(self.num_qubits, size, workers=1, dtype=self.dtype)
+        for gate in gates:
+            batch.run([gate])
+            if gate[0] in self.noise.gates:
+                for qubit in gate[1:]:
+                    self._apply_noise(batch, qubit, rng)
+        probs = batch.data.real ** 2 + batch.data.imag ** 2
+        values = {name: np.asarray(fn(batch), dtype=np.float64) for name, fn in observables.items()}
+        return np.sum(probs, axis=0, dtype=np.float64), values
+
+    # 회로를 trajectories번 실행하고 평균 확률과 관측량을 계산
+    # observables: 이름 -> 함수(BatchedStateVector) -> 궤적별 값 배열 (batch,)
+    def run(self, gates, observables=None):
+        observables = observables or {}
+        gates = list(gates)
+        sizes = [self.batch_size] * (self.trajectories // self.batch_size)
+        if self.trajectories % self.batch_size:
+            sizes.append(self.trajectories % self.batch_size)
+        rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(self.seed).spawn(len(sizes))]
+
+        def run_one(args):
+            return self._run_batch(gates, *args, observables)
+
+        jobs = list(zip(sizes, rngs))
+        if self.workers <= 1 or len(jobs) == 1:
+            results = [run_one(job) for job in jobs]
+        else:
+            results = list(_get_thread_pool(self.workers).map(run_one, jobs))
+
+        self._probabilities = sum(r[0] for r in results) / self.trajectories
+        self.expectations = {}
+        for name in observables:
+            values = np.concatenate([r[1][name] for r in results])
+            error = values.std(ddof=1) / math.sqrt(values.size) if values.size > 1 else 0.0
+            self.expectations[name] = (float(values.mean()), float(error))
+        self.version += 1
+        return self
+
+    # 궤적 평균 측정 확률 (밀도 행렬의 대각 성분 추정값)
+    def probabilities(self):
+        if self._probabilities is None:
+            raise ValueError("run() must be called first")
+        return self._probabilities
+
+    # 궤적 평균으로 특정 큐비트가 |1>로 측정될 확률
+    def qubit_probability(self, qubit):
+        probs = self.probabilities().reshape(2 ** qubit, 2, -1)
+        return float(probs[:, 1, :].sum())
+
+
+# 고전 가역 회로로 실행할 수 있는 게이트 (계산 기저 상태를 다른 기저 상태로 보내는 치환)
+REVERSIBLE_GATES = {"x", "cnot", "ccx"}
+
+
+# 회로에 X, CNOT, Toffoli만 있는지 확인
+def is_reversible(gates):
+    return all(name in REVERSIBLE_GATES for name, *_ in gates)
+
+
+# 모든 입력을 나열할 수 있는 최대 큐비트 수 (28큐비트: 선 약 0.9GB + 출력 2GB)
+MAX_ENUMERATED_QUBITS = 28
+
+# 8x8 비트 행렬 전치용 (자리 바꿈 간격, 마스크)
+_TRANSPOSE8_STEPS = ((7, np.uint64(0x00AA00AA00AA00AA)),
+                     (14, np.uint64(0x0000CCCC0000CCCC)),
+                     (28, np.uint64(0x00000000F0F0F0F0)))
+
+
+# 8개 선의 바이트 묶음 (8, B)을 입력별 바이트 (8*B,)로 전치 (선 r의 비트 -> 출력 바이트의 7-r번째 비트)
+def _transpose8(rows):
+    x = np.ascontiguousarray(rows[::-1].T).view(_WORD).ravel()
+    for shift, mask in _TRANSPOSE8_STEPS:
+        t = (x ^ (x >> np.uint64(shift))) & mask
+        x ^= t ^ (t << np.uint64(shift))
+    return x.view(np.uint8)
+
+
+# 비트 병렬 가역 회로 시뮬레이터 정의
+# 입력 비트열 여러 개를 큐비트(선)별로 64개씩 uint64 워드에 묶어 저장하고,
+# X는 전체 반전, CNOT은 XOR, Toffoli는 AND 후 XOR로 모든 입력을 한 번에 계산
+class BitSlicedState:
+    def __init__(self, num_qubits, inputs=None):
+        if not 1 <= num_qubits <= 64:
+            raise ValueError("num_qubits must be within [1, 64]")
+        self.num_qubits = num_qubits
+        if inputs is None:
+            self._set_all_inputs()
+        else:
+            inputs = np.asarray(inputs, dtype=np.uint64).ravel()
+            self.count = inputs.size
+            bits = [((inputs >> np.uint64(num_qubits - 1 - q)) & np.uint64(1)).astype(bool)
+                    for q in range(num_qubits)]
+            self.wires = _pack_bits(np.array(bits).reshape(num_qubits, self.count))
+
+    # 2^n개의 모든 입력을 순서대로 채움 (입력 i의 큐비트 q 값 = i의 (n-1-q)번째 비트)
+    def _set_all_inputs(self):
+        n = self.num_qubits
+        if n > MAX_ENUMERATED_QUBITS:
+            size = (n // 8 + 8) << n
+            raise ValueError(f"enumerating all 2^{n} inputs needs about {size / 2 ** 30:.0f} GiB; "
+                             f"limited to {MAX_ENUMERATED_QUBITS} qubits (pass explicit inputs instead)")
+        self.count = 2 ** n
+        words = (self.count + 63) // 64
+        self.wires = np.zeros((n, words), dtype=_WORD)
+        word_index = np.arange(words, dtype=np.uint64)
+        for q in range(n):
+            k = n - 1 - q
+            if k < 6:
+                # 주기가 64보다 짧은 비트: 모든 워드가 같은 무늬
+                pattern = sum(1 << j for j in range(64) if (j >> k) & 1)
+                self.wires[q] = np.uint64(pattern)
+            else:
+                self.wires[q] = np.where((word_index >> np.uint64(k - 6)) & np.uint64(1), _ONES, 0)
+
+    def _check(self, *qubits):
+        for q in qubits:
+            if not 0 <= q < self.num_qubits:
+                raise ValueError(f"qubit index {q} out of range for {self.num_qubits} qubits")
+        if len(set(qubits)) != len(qubits):
+            raise ValueError("target qubits must be distinct")
+
+    def x(self, qubit):
+        self._check(qubit)
+        self.wires[qubit] ^= _ONES
+
+    def cnot(self, control, target):
+        self._check(control, target)
+        self.wires[target] ^= self.wires[control]
+
+    def ccx(self, control1, control2, target):
+        self._check(control1, control2, target)
+        self.wires[target] ^= self.wires[control1] & self.wires[control2]
+
+    def run(self, gates):
+        ops = {"x": self.x, "cnot": self.cnot, "ccx": self.ccx}
+        for name, *qubits in gates:
+            if name not in ops:
+                raise ValueError(f"gate '{name}' is not a reversible classical gate")
+            ops[name](*qubits)
+        return self
+
+    # 입력별 출력 비트열 (기저 인덱스, uint64)
+    # 선을 8개씩 묶어 8x8 비트 블록 전치로 출력의 한 바이트씩 채움 (선마다 비트를 풀지 않음)
+    def outputs(self):
+        n = self.num_qubits
+        pad = -n % 8
+        wires = np.ascontiguousarray(self.wires, dtype=_WORD).view(np.uint8)
+        if pad:
+            wires = np.concatenate([np.zeros((pad, wires.shape[1]), dtype=np.uint8), wires])
+        out = np.zeros(self.count, dtype=_WORD)
+        columns = out.view(np.uint8).reshape(self.count, 8)
+        groups = (n + pad) // 8
+        for g in range(groups):
+            columns[:, groups - 1 - g] = _transpose8(wires[8 * g:8 * g + 8])[:self.count]
+        return out.astype(np.uint64, copy=False)
+
+
+# 가역 회로의 진리표: 입력 i(0..2^n-1)에 대한 출력 비트열 배열
+def truth_table(circuit):
+    return BitSlicedState(circuit.num_qubits).run(circuit.gates).outputs()
+
+
+# 회로에 클리퍼드 게이트만 있는지 확인
+def is_clifford(gates):
+    return all(name in CLIFFORD_GATES for name, *_ in gates)
+
+
+# 회로에 맞는 백엔드를 자동으로 골라 실행
+# 클리퍼드 회로는 안정자 테이블, 상태 벡터에 담기지 않는 넓은 회로는 희소 상태, 그 외는 상태 벡터
+# 상태 벡터 계열 백엔드에서는 compile_gates()로 게이트를 융합해 상태를 훑는 횟수를 줄임
+def simulate(num_qubits, gates, compile=True):
+    gates = list(gates)
+    if is_clifford(gates):
+        return StabilizerState(num_qubits).run(gates)
+    backend = SparseState if num_qubits > MAX_DENSE_QUBITS else StateVector
+    return backend(num_qubits).run(compile_gates(gates) if compile else gates)
+
+
+# 그로버 검색 엔진 정의
+# N개 항목의 균등 중첩에서 시작해 오라클(표시된 항목 위상 반전)과 확산(평균에 대한 반사)을 제자리에서 반복
+class GroverSearch:
+    def __init__(self, num_items, marked, dtype=np.float64):
+        if num_items < 1:
+            raise ValueError("num_items must be at least 1")
+        marked = np.unique(np.asarray(marked, dtype=np.int64).ravel())
+        if marked.size == 0 or marked[0] < 0 or marked[-1] >= num_items:
+            raise ValueError("marked indices must be non-empty and within [0, num_items)")
+        self.num_items = num_items
+        self.marked = marked
+        self.amplitudes = np.empty(num_items, dtype=dtype)  # 그로버 진폭은 항상 실수 (float32/float64)
+        self.reset()
+
+    # 균등 중첩 상태로 초기화
+    def reset(self):
+        self.amplitudes.fill(1 / math.sqrt(self.num_items))
+        self.iteration = 0
+        self.version = getattr(self, "version", 0) + 1
+
+    # 오라클: 표시된 항목의 위상 반전
+    def oracle(self):
+        self.amplitudes[self.marked] *= -1
+        self.version += 1
+
+    # 확산: 평균에 대한 반사 (a -> 2*mean - a), O(N)
+    def diffuse(self):
+        mean = self.amplitudes.mean()
+        self.amplitudes *= -1
+        self.amplitudes += 2 * mean
+        self.version += 1
+
+    # 그로버 반복 1회
+    def step(self):
+        self.oracle()
+        self.diffuse()
+        self.iteration += 1
+
+    # 성공 확률이 최대가 되는 반복 횟수
+    def optimal_iterations(self):
+        return optimal_grover_iterations(self.num_items, self.marked.size)
+
+    def probabilities(self):
+        return self.amplitudes ** 2
+
+    # 표시된 항목 중 하나가 측정될 확률
+    def success_probability(self):
+        marked = self.amplitudes[self.marked].astype(np.float64)
+        return float(np.dot(marked, marked))
+
+    # 반복마다(0회 포함) 확률 분포 스냅샷을 생성
+    def snapshots(self, iterations=None):
+        if iterations is None:
+            iterations = self.optimal_iterations()
+        yield self.probabilities()
+        for _ in range(iterations):
+            self.step()
+            yield self.probabilities()
+
+    # 지정한 횟수만큼 반복하고 반복별 성공 확률 기록을 반환
+    def run(self, iterations=None):
+        if iterations is None:
+            iterations = self.optimal_iterations()
+        history = np.empty(iterations + 1)
+        history[0] = self.success_probability()
+        for t in range(1, iterations + 1):
+            self.step()
+            history[t] = self.success_probability()
+        return history
+
+
+# k/N 비율에 대한 최적 그로버 반복 횟수 (스칼라 또는 NumPy 배열)
+def optimal_grover_iterations(num_items, num_marked=1):
+    theta = np.arcsin(np.sqrt(np.asarray(num_marked, dtype=np.float64) / np.asarray(num_items, dtype=np.float64)))
+    iterations = np.floor(np.pi / (4 * theta))
+    if np.ndim(iterations) == 0:
+        return int(iterations)
+    return iterations.astype(np.int64)
+
+
+# 이 크기 이하의 N은 전체 진폭 벡터로 계산 (float64 2^24개 = 128 MiB)
+DENSE_GROVER_LIMIT = 2 ** 24
+
+
+# 축소 부분공간 그로버 엔진 정의
+# 표시 항목 k개와 나머지 N-k개가 각각 같은 진폭을 가지므로 진폭 두 개만 추적 (메모리 O(1), N은 2^64 이상도 가능)
+# t회 반복 후 성공 확률은 sin^2((2t+1)θ), sin θ = sqrt(k/N)
+class ReducedGroverSearch:
+    def __init__(self, num_items, num_marked=1):
+        if num_items < 1:
+            raise ValueError("num_items must be at least 1")
+        if not 1 <= num_marked <= num_items:
+            raise ValueError("num_marked must be within [1, num_items]")
+        self.num_items = num_items
+        self.num_marked = num_marked
+        self.theta = math.asin(math.sqrt(num_marked / num_items))
+        self.reset()
+
+    # 균등 중첩 상태로 초기화
+    def reset(self):
+        self.marked_amplitude = 1 / math.sqrt(self.num_items)
+        self.unmarked_amplitude = 1 / math.sqrt(self.num_items)
+        self.iteration = 0
+
+    # 그로버 반복 1회 (오라클 + 확산을 두 진폭에만 적용)
+    def step(self):
+        k, n = self.num_marked, self.num_items
+        a, b = -self.marked_amplitude, self.unmarked_amplitude
+        mean = (k * a + (n - k) * b) / n
+        self.marked_amplitude = 2 * mean - a
+        self.unmarked_amplitude = 2 * mean - b
+        self.iteration += 1
+
+    def optimal_iterations(self):
+        return optimal_grover_iterations(self.num_items, self.num_marked)
+
+    # t회 반복 후 (표시 항목 하나, 나머지 항목 하나)의 진폭 (닫힌 형태)
+    def amplitudes(self, iterations):
+        angle = (2 * np.asarray(iterations, dtype=np.float64) + 1) * self.theta
+        marked = np.sin(angle) / math.sqrt(self.num_marked)
+        if self.num_marked == self.num_items:
+            return marked, np.zeros_like(marked)
+        return marked, np.cos(angle) / math.sqrt(self.num_items - self.num_marked)
+
+    # t회 반복 후 (표시 항목 하나, 나머지 항목 하나)가 측정될 확률
+    def item_probabilities(self, iterations):
+        marked, unmarked = self.amplitudes(iterations)
+        return marked ** 2, unmarked ** 2
+
+    # 성공 확률: iterations를 주면 닫힌 형태(배열 가능), 생략하면 현재 상태 기준
+    def success_probability(self, iterations=None):
+        if iterations is None:
+            return self.num_marked * self.marked_amplitude ** 2
+        return np.sin((2 * np.asarray(iterations, dtype=np.float64) + 1) * self.theta) ** 2
+
+    # 지정한 횟수만큼 반복하고 반복별 성공 확률 기록을 반환
+    def run(self, iterations=None):
+        if iterations is None:
+            iterations = self.optimal_iterations()
+        history = np.empty(iterations + 1)
+        history[0] = self.success_probability()
+        for t in range(1, iterations + 1):
+            self.step()
+            history[t] = self.success_probability()
+        return history
+
+
+# 확률 분포에서 측정 결과를 뽑는 샘플러 정의
+# 누적 분포(CDF)와 안내 테이블(guide table)을 한 번 만들어 두고 재사용하며, shots번 측정을 벡터 연산 몇 번으로 처리
+class Sampler:
+    def __init__(self, probabilities):
+        probs = np.asarray(probabilities).ravel()
+        if probs.size == 0:
+            raise ValueError("probabilities must not be empty")
+        cdf = np.cumsum(probs, dtype=np.float64)  # 확률은 상태 정밀도 그대로, 누적은 float64로
+        total = cdf[-1]
+        if not total > 0:
+            raise ValueError("probabilities must have a positive sum")
+        self.probabilities = probs / total
+        self.cdf = cdf / total
+        self.cdf[-1] = 1.0
+        # guide[j]: CDF가 j/N을 처음 넘는 인덱스 -> 추출 시 이분 탐색 없이 시작 위치를 바로 찾음
+        self.guide = np.searchsorted(self.cdf, np.arange(probs.size) / probs.size, side="right")
+        self.index_dtype = np.min_scalar_type(probs.size - 1)  # 결과 인덱스를 담는 가장 작은 정수형
+
+    @property
+    def size(self):
+        return self.probabilities.size
+
+    # 측정 결과(기저 인덱스)를 shots개 추출
+    def sample(self, shots, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        u = rng.random(shots)
+        indices = self.guide[(u * self.size).astype(np.intp)]
+        # 같은 안내 칸 안에서 CDF가 u를 넘을 때까지 앞으로 이동 (기대 횟수 O(1))
+        pending = np.flatnonzero(self.cdf[indices] <= u)
+        while pending.size:
+            indices[pending] += 1
+            pending = pending[self.cdf[indices[pending]] <= u[pending]]
+        return indices.astype(self.index_dtype)
+
+    # 기저 인덱스별 측정 횟수 (길이 2^n 정수 배열)
+    # shots가 상태 수보다 많으면 다항분포 추출 한 번으로 O(N)에 끝냄
+    def histogram(self, shots, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        if shots >= self.size:
+            return rng.multinomial(shots, self.probabilities.astype(np.float64))
+        return np.bincount(self.sample(shots, rng), minlength=self.size)
+
+
+# 상태별 샘플러 캐시: 상태가 바뀌지 않았다면 (version 동일) CDF를 다시 만들지 않음
+_sampler_cache = weakref.WeakKeyDictionary()
+
+
+# 상태(StateVector, GroverSearch 또는 확률 배열)에 대한 샘플러를 반환
+def get_sampler(state):
+    if isinstance(state, np.ndarray):
+        return Sampler(state)
+    cached = _sampler_cache.get(state)
+    if cached is not None and cached[0] == state.version:
+        return cached[1]
+    sampler = Sampler(state.probabilities())
+    _sampler_cache[state] = (state.version, sampler)
+    return sampler
+
+
+# (shots x n) 비트 배열을 uint64 기저 인덱스 배열로 변환 (큐비트 0이 최상위 비트)
+def _bits_to_indices(bits):
+    bits = np.asarray(bits)
+    if bits.shape[1] > 64:
+        raise ValueError(f"{bits.shape[1]} qubits do not fit in a uint64 index; use sample(..., bits=True)")
+    weights = np.uint64(1) << np.arange(bits.shape[1] - 1, -1, -1, dtype=np.uint64)
+    return (bits.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+
+# uint64 기저 인덱스 배열을 (shots x width) uint8 비트 배열로 변환
+def _indices_to_bits(indices, width):
+    shifts = np.arange(width - 1, -1, -1, dtype=np.uint64)
+    return ((indices[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+# 상태를 shots번 측정한 결과 - 모든 백엔드에서 같은 형식으로 반환
+# 기본: 기저 인덱스 uint64 배열 (큐비트 0이 최상위 비트, GroverSearch와 확률 배열은 항목 번호)
+# bits=True: (shots x n) uint8 비트 배열 (64큐비트보다 넓은 안정자/MPS 상태는 이 형식으로만 추출 가능)
+# StabilizerState, SparseState, MPSState는 자체 sample()을, 나머지는 확률 분포 샘플러를 사용
+def sample(state, shots, rng=None, bits=False):
+    if isinstance(state, (StabilizerState, MPSState)):
+        outcomes = np.asarray(state.sample(shots, rng), dtype=np.uint8)
+        return outcomes if bits else _bits_to_indices(outcomes)
+    if isinstance(state, SparseState):
+        outcomes, width = state.sample(shots, rng), state.num_qubits
+    else:
+        sampler = get_sampler(state)
+        outcomes = sampler.sample(shots, rng).astype(np.uint64)
+        width = getattr(state, "num_qubits", max(1, (sampler.size - 1).bit_length()))
+    return _indices_to_bits(outcomes, width) if bits else outcomes
+
+
+# 상태를 shots번 측정해 (나온 기저 인덱스 uint64, 횟수 int64) 배열 쌍으로 반환 (0회인 기저는 생략)
+# 상태 벡터 계열은 분포 샘플러의 히스토그램을, 그 외 백엔드는 sample()과 np.unique를 사용
+# (희소/MPS/안정자 상태에 대해 2^n 확률 배열을 만들지 않음)
+def histogram(state, shots, rng=None):
+    if isinstance(state, (StabilizerState, SparseState, MPSState)):
+        outcomes, counts = np.unique(sample(state, shots, rng), return_counts=True)
+        return outcomes, counts.astype(np.int64)
+    counts = get_sampler(state).histogram(shots, rng)
+    outcomes = np.flatnonzero(counts)
+    return outcomes.astype(np.uint64), counts[outcomes].astype(np.int64)
+
+
+# 결과 캐시 설정
+CACHE_MAX_BYTES = 256 << 20  # 메모리에 둘 결과의 최대 크기 (바이트)
+CACHE_DIR_ENV = "QUANTUM_CACHE_DIR"  # 이 환경 변수로 디렉터리를 지정하면 결과를 .npy 파일로도 저장
+
+
+# 캐시 키에 들어가는 값을 타입과 함께 정규화해 해시에 추가 (같은 내용이면 같은 키)
+def _hash_update(h, value):
+    if isinstance(value, (np.ndarray, np.generic)) and not isinstance(value, (np.integer, np.floating)):
+        array = np.ascontiguousarray(value)
+        h.update(f"a{array.dtype.str}{array.shape}|".encode())
+        h.update(array)
+    elif isinstance(value, (tuple, list)):
+        h.update(f"l{len(value)}|".encode())
+        for item in value:
+            _hash_update(h, item)
+    elif value is None:
+        h.update(b"n|")
+    elif isinstance(value, (int, np.integer)):
+        h.update(f"i{int(value)}|".encode())
+    elif isinstance(value, (float, np.floating)):
+        h.update(f"f{float(value)!r}|".encode())
+    elif isinstance(value, str):
+        h.update(f"s{len(value)}:{value}|".encode())
+    elif isinstance(value, np.dtype):
+        h.update(f"d{value.str}|".encode())
+    else:
+        raise TypeError(f"cannot use {type(value).__name__} in a cache key")
+
+
+# 값들의 정규 해시 (16진수 문자열)
+def cache_key(*parts):
+    h = hashlib.sha256()
+    _hash_update(h, parts)
+    return h.hexdigest()
+
+
+# 회로 결과의 캐시 키: (회로, 초기 상태, 백엔드, 정밀도)
+def circuit_key(num_qubits, gates, initial=None, backend="dense", dtype=np.complex128, compile=True):
+    return cache_key("circuit", num_qubits, [tuple(gate) for gate in gates], initial, backend, np.dtype(dtype),
+                     compile)
+
+
+# 내용 주소(해시 키) 결과 캐시
+# 메모리에는 최근에 쓴 순서(LRU)로 max_bytes까지 배열을 두고, 넘치면 가장 오래 쓰지 않은 것부터 버림
+# directory를 주면 저장할 때 <키>.npy로 함께 기록하고, 메모리에 없는 키는 파일을 메모리 매핑해 다시 읽음
+# 백그라운드 작업 스레드에서도 쓰므로 잠금으로 보호하며, 돌려주는 배열은 읽기 전용
+class ResultCache:
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.entries = OrderedDict()  # 키 -> 배열 (끝쪽이 최근에 쓴 것)
+        self.nbytes = 0
+        self.hits = 0  # 메모리에서 찾음
+        self.disk_hits = 0  # 디스크에서 찾음
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def _insert(self, key, value):
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key).nbytes
+        self.entries[key] = value
+        self.nbytes += value.nbytes
+        while self.nbytes > self.max_bytes and self.entries:
+            _, old = self.entries.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+
+    # 키에 해당하는 배열 (없으면 None)
+    def get(self, key):
+        with self._lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self.directory is not None and os.path.exists(self._path(key)):
+                value = np.load(self._path(key), mmap_mode="r")
+                self._insert(key, value)
+                self.disk_hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    # 배열의 읽기 전용 복사본을 저장하고 반환
+    def put(self, key, value):
+        value = np.array(value)
+        value.flags.writeable = False
+        with self._lock:
+            self._insert(key, value)
+        if self.directory is not None and not os.path.exists(self._path(key)):
+            temp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp, "wb") as f:
+                np.save(f, value)
+            os.replace(temp, self._path(key))
+        return value
+
+    # 캐시에 있으면 그 값을, 없으면 compute()로 계산해 저장한 값을 반환
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    # 메모리(와 disk=True이면 디렉터리의 .npy 파일)를 비움 (통계는 유지)
+    def clear(self, disk=False):
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+        if disk and self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.entries), "nbytes": self.nbytes,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0}
+
+
+# 기본 결과 캐시 (QUANTUM_CACHE_DIR를 지정하면 디스크에도 저장)
+RESULT_CACHE = ResultCache(directory=os.environ.get(CACHE_DIR_ENV) or None)
+
+
+# 상태 벡터에서 회로를 실행하되, 같은 (회로, 초기 상태, 백엔드, 정밀도) 결과가 캐시에 있으면 최종 상태를 복사해 옴
+def run_cached(state, gates, cache=None, compile=True):
+    cache = RESULT_CACHE if cache is None else cache
+    gates = list(gates)
+    key = circuit_key(state.num_qubits, gates, state.data, type(state).__name__, state.dtype, compile)
+    final = cache.get(key)
+    if final is None:
+        state.run(compile_gates(gates) if compile else gates)
+        cache.put(key, state.data)
+    else:
+        np.copyto(state.data, final)
+        state.version += 1
+    return state
+
+
+# 백그라운드 작업 정의
+# 작업 함수는 첫 인자로 Job을 받아 job.report(진행률, 부분 결과)로 진행 상황을 알리며, 취소되면 report()에서 JobCancelled 발생
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, messages):
+        self.messages = messages  # UI 스레드로 보내는 (작업, 종류, 값) 큐
+        self.status = "running"  # running, done, cancelled, error
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    # 취소 요청 (작업은 다음 report() 호출에서 멈춤)
+    def cancel(self):
+        self._cancel.set()
+
+    def report(self, fraction, partial=None):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.messages.put((self, "progress", (fraction, partial)))
+
+
+# shots번 측정을 batch개씩 나눠 수행하며 누적 히스토그램을 부분 결과로 보고
+def histogram_job(job, state, shots, batch=1 << 20, rng=None):
+    sampler = get_sampler(state)
+    counts = np.zeros(sampler.size, dtype=np.int64)
+    done = 0
+    while done < shots:
+        size = min(batch, shots - done)
+        counts += sampler.histogram(size, rng)
+        done += size
+        job.report(done / shots, counts.copy())  # 작업 스레드가 계속 고치는 배열은 넘기지 않음
+    return counts
+
+
+# 그로버 검색을 진행하며 반복마다 (표시 항목 확률, 나머지 항목 확률)을 기록하고 마지막에 한 번 측정
+# 기록은 (반복 횟수 + 1, 2) 배열로 cache에 저장하며, 측정값은 매번 마지막 분포에서 새로 뽑음
+# 반환: (반복 횟수, 기록, 성공 확률, 측정값)
+def grover_history_job(job, num_items, marked, cache=None, rng=None):
+    def compute():
+        engine = GroverSearch(num_items, [marked])
+        iterations = engine.optimal_iterations()
+        watched = [marked, (marked + 1) % num_items]  # 기록할 두 항목의 진폭만 읽음 (전체 확률 배열을 만들지 않음)
+        history = np.empty((iterations + 1, 2), dtype=np.float64)
+        for t in range(iterations + 1):
+            if t:
+                engine.step()
+            history[t] = engine.amplitudes[watched] ** 2
+            job.report((t + 1) / (iterations + 1))
+        return history
+
+    key = cache_key("grover_history", num_items, marked)
+    history = compute() if cache is None else cache.get_or_compute(key, compute)
+    success = float(history[-1, 0])
+
+    # 측정: 성공 확률로 표시 항목, 아니면 나머지 항목 중 하나를 균등하게
+    rng = rng if rng is not None else np.random.default_rng()
+    measured = marked
+    if num_items > 1 and rng.random() >= success:
+        measured = int(rng.integers(num_items - 1))
+        measured += measured >= marked
+    return len(history) - 1, history, success, measured
+
+
+# 병렬 검색 시연: 반복마다 ceil(sqrt(N))개 항목을 중복 없이 무작위로 골라 동시에 검사하고, 표시 항목이 나오면 멈춤
+# 반환: 반복별로 고른 인덱스 배열 목록
+def parallel_search_job(job, num_items, marked, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    steps = math.ceil(math.sqrt(num_items))
+    size = min(steps, num_items)
+    picks = []
+    for step in range(steps):
+        indices = rng.choice(num_items, size, replace=False)
+        picks.append(indices)
+        job.report((step + 1) / steps)
+        if np.any(indices == marked):
+            break
+    return picks
+
+
+# 최적 횟수만큼 그로버 반복 후 [first, first + count) 구간의 확률과 성공 확률 계산
+# 상태 벡터에 담을 수 있는 N은 그로버 엔진으로 (구간 확률은 cache에 저장), 그보다 크면 축소 부분공간 엔진의 닫힌 형태로 계산
+def grover_distribution_job(job, num_items, marked, first, count, cache=None):
+    if num_items <= DENSE_GROVER_LIMIT:
+        def compute():
+            engine = GroverSearch(num_items, [marked])
+            for t in range(iterations):
+                engine.step()
+                job.report((t + 1) / iterations)
+            return engine.probabilities()[first:first + count]
+
+        iterations = optimal_grover_iterations(num_items)
+        key = cache_key("grover_distribution", num_items, marked, first, count)
+        probs = compute() if cache is None else cache.get_or_compute(key, compute)
+        return iterations, probs, float(ReducedGroverSearch(num_items).success_probability(iterations))
+    engine = ReducedGroverSearch(num_items)
+    iterations = engine.optimal_iterations()
+    marked_prob, unmarked_prob = engine.item_probabilities(iterations)
+    # 2^63 이상의 인덱스도 다루도록 배열 비교 대신 파이썬 정수로 위치를 계산
+    probs = np.full(count, unmarked_prob, dtype=np.float64)
+    if first <= marked < first + count:
+        probs[marked - first] = marked_prob
+    return iterations, probs, float(engine.success_probability(iterations))
+
+
+# 파울리 문자열을 측정 기저로 돌리는 게이트 (Z는 그대로, X는 H, Y는 S† 다음 H)
+PAULI_BASIS_CHANGE = {"X": ("h",), "Y": ("sdg", "h"), "Z": ()}
+
+
+# 파울리 문자열("ZZI", "XIX" 등) 검사: 문자 위치 q가 큐비트 q
+def _parse_pauli(pauli, num_qubits):
+    pauli = pauli.upper()
+    if len(pauli) != num_qubits or set(pauli) - set("IXYZ"):
+        raise ValueError(f"invalid Pauli string '{pauli}' for {num_qubits} qubits")
+    return pauli
+
+
+# 큐비트별로 서로 교환하는(같은 측정 기저를 쓰는) 파울리 문자열끼리 탐욕적으로 묶음
+# 반환: [(큐비트별 기저 문자열, 원래 위치 목록), ...]
+def _group_paulis(paulis):
+    groups = []
+    for pos, pauli in enumerate(paulis):
+        for group in groups:
+            basis = group[0]
+            if all(p == "I" or b in ("I", p) for p, b in zip(pauli, basis)):
+                group[0] = "".join(b if p == "I" else p for p, b in zip(pauli, basis))
+                group[1].append(pos)
+                break
+        else:
+            groups.append([pauli, [pos]])
+    return groups
+
+
+# 고속 월시-아다마르 변환 (제자리): values[k] <- sum_j values[j] * (-1)^popcount(j & k)
+def _walsh_hadamard(values):
+    h = 1
+    while h < values.size:
+        pairs = values.reshape(-1, 2, h)
+        first = pairs[:, 0, :].copy()
+        pairs[:, 0, :] += pairs[:, 1, :]
+        pairs[:, 1, :] *= -1
+        pairs[:, 1, :] += first
+        h *= 2
+    return values
+
+
+# 파울리 문자열 목록의 기댓값 <psi|P|psi>를 한꺼번에 계산 (2^n x 2^n 연산자는 만들지 않음)
+# 같은 측정 기저를 공유하는 문자열은 한 묶음으로 처리: 상태를 그 기저로 돌린 확률 분포를 한 번 구한 뒤
+# 묶음이 쓰는 큐비트로 주변화하고, 각 문자열의 값은 Z 비트 마스크에 대한 부호 (-1)^popcount(i & mask)의 합
+# 문자열이 많으면 주변 분포에 월시-아다마르 변환을 한 번 적용해 모든 마스크의 합을 동시에 얻음
+def pauli_expectations(state, paulis):
+    n = state.num_qubits
+    paulis = [_parse_pauli(p, n) for p in paulis]
+    results = np.zeros(len(paulis), dtype=np.float64)
+    for basis, members in _group_paulis(paulis):
+        if set(basis) <= {"I", "Z"}:
+            probs = state.probabilities()
+        else:
+            rotated = StateVector(n, chunk_size=state.chunk_size, workers=state.workers, dtype=state.dtype)
+            np.copyto(rotated.data, state.data)
+            rotated.run([(name, q) for q, b in enumerate(basis) if b != "I" for name in PAULI_BASIS_CHANGE[b]])
+            probs = rotated.probabilities()
+            del rotated
+
+        # 묶음이 쓰는 큐비트(support)만 남기고 나머지 큐비트는 합쳐서 없앰
+        support = [q for q, b in enumerate(basis) if b != "I"]
+        others = tuple(q for q in range(n) if basis[q] == "I")
+        marginal = np.sum(probs.reshape([2] * n), axis=others, dtype=np.float64).ravel()
+        masks = [sum(1 << (len(support) - 1 - k) for k, q in enumerate(support) if paulis[pos][q] != "I")
+                 for pos in members]
+
+        if len(members) > len(support):
+            spectrum = _walsh_hadamard(marginal)
+            results[members] = spectrum[masks]
+        else:
+            index = np.arange(marginal.size, dtype=_WORD)
+            for pos, mask in zip(members, masks):
+                parity = (_popcount(index & np.uint64(mask)) & 1).astype(np.float64)
+                results[pos] = float(np.sum(marginal * (1 - 2 * parity)))
+    return results
+
+
+# 명세 실행에 쓸 수 있는 백엔드
+BACKENDS = ("auto", "dense", "sparse", "stabilizer", "mps")
+ENGINES = {"dense": StateVector, "sparse": SparseState, "stabilizer": StabilizerState, "mps": MPSState}
+
+
+# 백엔드 이름으로 빈 상태 생성 ("auto"는 상태 벡터에 담기면 StateVector, 아니면 SparseState)
+def make_state(num_qubits, backend="auto"):
+    if backend == "auto":
+        backend = "dense" if num_qubits <= MAX_DENSE_QUBITS else "sparse"
+    if backend not in ENGINES:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    return ENGINES[backend](num_qubits)
+
+
+# OpenQASM 2.0 부분집합 입출력
+# 지원: OPENQASM/include 헤더, qreg, creg, barrier(무시), measure(회로 끝에서만), x y z h s sdg t tdg cx cz ccx,
+#       임의 단일 큐비트 게이트 u3/u/U(θ,φ,λ), u2(φ,λ), u1/p/rz(λ), rx(θ), ry(θ) (전역 위상은 무시)
+# 레지스터 인자(예: h q;)는 레지스터의 모든 큐비트에 나눠 적용하고, 여러 qreg는 선언 순서대로 이어 붙여 번호를 매김
+# 파일을 문장 단위로 읽어 게이트를 하나씩 내보내므로 회로 길이와 무관하게 파서 메모리가 일정함
+QASM_GATES = {"x": "x", "y": "y", "z": "z", "h": "h", "s": "s", "sdg": "sdg", "t": "t", "tdg": "tdg",
+              "cx": "cnot", "CX": "cnot", "cz": "cz", "ccx": "ccx"}
+QASM_NAMES = {"cnot": "cx", "cz": "cz", "ccx": "ccx", **{name: name for name in GATES}}  # 내보낼 때 쓰는 이름
+QASM_CHUNK_GATES = 4096  # 스트리밍 실행 시 한 번에 융합(compile_gates)해 적용할 게이트 수
+
+_QASM_FUNCTIONS = {"sin": math.sin, "cos": math.cos, "tan": math.tan, "exp": math.exp, "ln": math.log,
+                   "sqrt": math.sqrt}
+_QASM_OPERATORS = {ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b, ast.Mult: lambda a, b: a * b,
+                   ast.Div: lambda a, b: a / b, ast.Pow: lambda a, b: a ** b}
+_QASM_REGISTER = re.compile(r"(qreg|creg)\s+([A-Za-z_]\w*)\s*\[\s*(\d+)\s*\]")
+_QASM_GATE = re.compile(r"([A-Za-z_]\w*)\s*(?:\((.*)\))?\s*(.*)", re.S)
+_QASM_ARG = re.compile(r"([A-Za-z_]\w*)\s*(?:\[\s*(\d+)\s*\])?")
+
+
+# U(θ,φ,λ) = [[cos(θ/2), -e^{iλ}sin(θ/2)], [e^{iφ}sin(θ/2), e^{i(φ+λ)}cos(θ/2)]]
+def u3_matrix(theta, phi, lam):
+    c, s = math.cos(theta / 2), math.sin(theta / 2)
+    return np.array([[c, -np.exp(1j * lam) * s],
+                     [np.exp(1j * phi) * s, np.exp(1j * (phi + lam)) * c]], dtype=np.complex128)
+
+
+# 단일 큐비트 유니터리를 전역 위상을 뺀 U(θ,φ,λ) 각도로 분해
+def u3_angles(matrix):
+    (a, b), (c, d) = np.asarray(matrix, dtype=np.complex128)
+    theta = 2 * math.atan2(abs(c), abs(a))
+    if abs(a) > 1e-12:
+        phase = np.angle(a)
+        phi = np.angle(c) - phase if abs(c) > 1e-12 else 0.0
+        lam = np.angle(d) - phase - phi
+    else:
+        phase = np.angle(c)
+        phi, lam = 0.0, np.angle(-b) - phase
+    return float(theta), math.remainder(float(phi), 2 * math.pi) + 0.0, math.remainder(float(lam), 2 * math.pi) + 0.0
+
+
+# 게이트 매개변수 식 계산 (숫자, pi, + - * / ^, 괄호, sin/cos/tan/exp/ln/sqrt만 허용)
+def _qasm_value(expr):
+    def value(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return float(node.value)
+        if isinstance(node, ast.Name) and node.id == "pi":
+            return math.pi
+        if isinstance(node, ast.BinOp) and type(node.op) in _QASM_OPERATORS:
+            return _QASM_OPERATORS[type(node.op)](value(node.left), value(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            return -value(node.operand) if isinstance(node.op, ast.USub) else value(node.operand)
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _QASM_FUNCTIONS
+                and len(node.args) == 1 and not node.keywords):
+            return _QASM_FUNCTIONS[node.func.id](value(node.args[0]))
+        raise ValueError(f"unsupported parameter expression '{expr}'")
+
+    try:
+        return value(ast.parse(expr.strip().replace("^", "**"), mode="eval").body)
+    except SyntaxError:
+        raise ValueError(f"invalid parameter expression '{expr}'") from None
+
+
+# 매개변수가 있는 단일 큐비트 게이트의 행렬
+def _qasm_unitary(name, params):
+    if name in ("u3", "u", "U") and len(params) == 3:
+        return u3_matrix(*params)
+    if name == "u2" and len(params) == 2:
+        return u3_matrix(math.pi / 2, *params)
+    if name in ("u1", "p", "rz") and len(params) == 1:
+        return u3_matrix(0.0, 0.0, params[0])
+    if name == "rx" and len(params) == 1:
+        return u3_matrix(params[0], -math.pi / 2, math.pi / 2)
+    if name == "ry" and len(params) == 1:
+        return u3_matrix(params[0], 0.0, 0.0)
+    return None
+
+
+# 줄 단위 입력을 (줄 번호, 문장) 단위로 나눔 (// 주석 제거, ;로 끝나는 문장이 여러 줄에 걸쳐도 됨)
+def _qasm_statements(lines):
+    buffer, start = [], None
+    for lineno, line in enumerate(lines, 1):
+        line = line.split("//", 1)[0]
+        while ";" in line:
+            head, line = line.split(";", 1)
+            buffer.append(head)
+            statement = " ".join(buffer).strip()
+            if statement:
+                yield start or lineno, statement
+            buffer, start = [], None
+        if line.strip():
+            buffer.append(line)
+            start = start or lineno
+    if " ".join(buffer).strip():
+        raise ValueError(f"line {start}: statement is missing ';'")
+
+
+# OpenQASM 2.0 파일을 한 문장씩 읽는 파서
+# read_header()로 첫 게이트 전까지의 선언(qreg, creg)을 읽어 큐비트 수를 정한 뒤, gates()로 게이트 튜플을 차례로 받음
+# 측정은 measurements에 (큐비트, 고전 비트)로 기록 (측정한 큐비트에 다시 게이트를 걸 수는 없음)
+class QasmReader:
+    def __init__(self, lines):
+        self.qregs = {}  # 이름 -> (첫 큐비트 번호, 크기)
+        self.cregs = {}
+        self.num_qubits = 0
+        self.num_clbits = 0
+        self.measurements = []
+        self.num_gates = 0
+        self._statements = _qasm_statements(lines)
+        self._pending = None
+        self._started = False
+
+    # 선언문이면 처리하고 True
+    def _declare(self, lineno, statement):
+        if statement.startswith("OPENQASM"):
+            if statement.split()[1:] != ["2.0"]:
+                raise ValueError(f"line {lineno}: only OPENQASM 2.0 is supported")
+            return True
+        if statement.startswith("include"):
+            return True
+        match = _QASM_REGISTER.fullmatch(statement)
+        if match is None:
+            return False
+        kind, name, size = match.group(1), match.group(2), int(match.group(3))
+        if name in self.qregs or name in self.cregs:
+            raise ValueError(f"line {lineno}: register '{name}' is already declared")
+        if kind == "qreg":
+            if self._started:
+                raise ValueError(f"line {lineno}: qreg '{name}' must be declared before the first gate")
+            self.qregs[name] = (self.num_qubits, size)
+            self.num_qubits += size
+        else:
+            self.cregs[name] = (self.num_clbits, size)
+            self.num_clbits += size
+        return True
+
+    # 인자 하나("q[3]" 또는 레지스터 전체 "q")를 번호 목록으로
+    def _operand(self, lineno, text, registers):
+        match = _QASM_ARG.fullmatch(text.strip())
+        if match is None or match.group(1) not in registers:
+            raise ValueError(f"line {lineno}: unknown register in '{text.strip()}'")
+        first, size = registers[match.group(1)]
+        if match.group(2) is None:
+            return list(range(first, first + size))
+        index = int(match.group(2))
+        if index >= size:
+            raise ValueError(f"line {lineno}: index {index} out of range for register '{match.group(1)}'")
+        return [first + index]
+
+    # 레지스터 인자를 펼쳐 인자 조합 목록으로 (크기가 1인 인자는 반복)
+    @staticmethod
+    def _broadcast(lineno, operands):
+        sizes = {len(op) for op in operands if len(op) > 1}
+        if len(sizes) > 1:
+            raise ValueError(f"line {lineno}: register arguments have different sizes")
+        count = sizes.pop() if sizes else 1
+        return [tuple(op[i] if len(op) > 1 else op[0] for op in operands) for i in range(count)]
+
+    def read_header(self):
+        if self._pending is None and not self._started:
+            for lineno, statement in self._statements:
+                if not self._declare(lineno, statement):
+                    self._pending = (lineno, statement)
+                    break
+            if not self.num_qubits:
+                raise ValueError("QASM program declares no qreg")
+        return self
+
+    # 게이트 튜플을 하나씩 생성
+    def gates(self):
+        self.read_header()
+        self._started = True
+        measured = set()
+        pending, self._pending = self._pending, None
+        statements = self._statements if pending is None else _chain_first(pending, self._statements)
+        for lineno, statement in statements:
+            if self._declare(lineno, statement):
+                continue
+            match = _QASM_GATE.fullmatch(statement)
+            name, params, args = match.group(1), match.group(2), match.group(3)
+            if name == "barrier":
+                continue
+            if name == "measure":
+                source, arrow, target = args.partition("->")
+                if not arrow:
+                    raise ValueError(f"line {lineno}: measure needs '->'")
+                pairs = self._broadcast(lineno, [self._operand(lineno, source, self.qregs),
+                                                 self._operand(lineno, target, self.cregs)])
+                self.measurements.extend(pairs)
+                measured.update(q for q, _ in pairs)
+                continue
+
+            try:
+                params = [_qasm_value(p) for p in params.split(",")] if params is not None and params.strip() else []
+            except ValueError as error:
+                raise ValueError(f"line {lineno}: {error}") from None
+            operands = [self._operand(lineno, arg, self.qregs) for arg in args.split(",")] if args.strip() else []
+            if name in QASM_GATES and not params:
+                gate = QASM_GATES[name]
+                arity = MULTI_QUBIT_GATES[gate].shape[0].bit_length() - 1 if gate in MULTI_QUBIT_GATES else 1
+                matrix = None
+            else:
+                matrix, arity = _qasm_unitary(name, params), 1
+                if matrix is None:
+                    raise ValueError(f"line {lineno}: unsupported statement '{statement}'")
+            if len(operands) != arity:
+                raise ValueError(f"line {lineno}: '{name}' takes {arity} qubit argument(s)")
+            for qubits in self._broadcast(lineno, operands):
+                if len(set(qubits)) != len(qubits):
+                    raise ValueError(f"line {lineno}: repeated qubit in '{statement}'")
+                if measured.intersection(qubits):
+                    raise ValueError(f"line {lineno}: gate after measure is not supported")
+                self.num_gates += 1
+                yield ("unitary", matrix, *qubits) if matrix is not None else (gate, *qubits)
+
+
+def _chain_first(first, rest):
+    yield first
+    yield from rest
+
+
+# 파일 경로 또는 줄 목록/파일 객체를 받아 줄 단위로 읽음
+def _qasm_lines(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source) as f:
+            yield from f
+    else:
+        yield from source
+
+
+# QASM 파일 전체를 Circuit으로 읽음 (작은 회로용; 큰 회로는 run_qasm으로 바로 실행)
+def read_qasm(source):
+    reader = QasmReader(_qasm_lines(source)).read_header()
+    circuit = Circuit(reader.num_qubits)
+    for gate in reader.gates():
+        circuit.append(gate)
+    return circuit, reader.measurements
+
+
+# QASM 파일을 읽으면서 바로 실행: 게이트를 chunk_gates개씩 모아 융합한 뒤 상태에 적용
+# state를 주지 않으면 backend로 새 상태를 만듦. 반환: (상태, 파서 - 큐비트 수, 게이트 수, 측정 정보)
+def run_qasm(source, state=None, backend="auto", chunk_gates=QASM_CHUNK_GATES):
+    reader = QasmReader(_qasm_lines(source)).read_header()
+    if state is None:
+        state = make_state(reader.num_qubits, backend)
+    elif state.num_qubits != reader.num_qubits:
+        raise ValueError(f"program has {reader.num_qubits} qubits but state has {state.num_qubits}")
+    fuse = isinstance(state, (StateVector, SparseState))
+    chunk = []
+    for gate in reader.gates():
+        chunk.append(gate)
+        if len(chunk) >= chunk_gates:
+            state.run(compile_gates(chunk) if fuse else chunk)
+            chunk = []
+    if chunk:
+        state.run(compile_gates(chunk) if fuse else chunk)
+    return state, reader
+
+
+# 게이트 튜플을 QASM 문장으로 (단일 큐비트 유니터리는 전역 위상을 뺀 u3로)
+def _qasm_statement(gate):
+    name, matrix, qubits = _gate_parts(gate)
+    args = ",".join(f"q[{q}]" for q in qubits)
+    if name != "unitary":
+        return f"{QASM_NAMES[name]} {args};\n"
+    if len(qubits) != 1:
+        raise ValueError("fused multi-qubit unitaries cannot be exported; export the circuit before compile()")
+    return "u3({!r},{!r},{!r}) {};\n".format(*u3_angles(matrix), args)
+
+
+# 회로(또는 게이트 튜플 반복자)를 QASM 파일로 한 문장씩 저장
+# measure=True이면 끝에 모든 큐비트를 같은 번호의 고전 비트로 측정
+def write_qasm(gates, target, num_qubits=None, measure=False):
+    num_qubits = gates.num_qubits if num_qubits is None else num_qubits
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "w") as f:
+            return write_qasm(gates, f, num_qubits, measure)
+    target.write(f'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[{num_qubits}];\ncreg c[{num_qubits}];\n')
+    for gate in gates:
+        target.write(_qasm_statement(gate))
+    if measure:
+        target.write("measure q -> c;\n")
+
+
+# 회로 명세 실행: {"num_qubits": n, "gates": [["h", 0], ["cnot", 0, 1], ...]}
+def _run_circuit_spec(spec, shots, backend, rng, probabilities):
+    num_qubits = int(spec["num_qubits"])
+    gates = [tuple(gate) for gate in spec["gates"]]
+    result = {"kind": "circuit", "num_qubits": num_qubits, "num_gates": len(gates), "timings": {}}
+
+    start = time.perf_counter()
+    if backend == "auto":
+        state = simulate(num_qubits, gates)
+    else:
+        state = make_state(num_qubits, backend)
+        state.run(compile_gates(gates) if isinstance(state, (StateVector, SparseState)) else gates)
+    result["timings"]["run"] = time.perf_counter() - start
+    return _state_result(result, state, shots, rng, probabilities,
+                         dense=lambda: StateVector(num_qubits).run(compile_gates(gates)))
+
+
+# QASM 명세 실행: {"qasm": "circuit.qasm"} (파일을 읽으면서 바로 실행)
+def _run_qasm_spec(path, shots, backend, rng, probabilities):
+    start = time.perf_counter()
+    state, reader = run_qasm(path, backend=backend)
+    result = {"kind": "qasm", "num_qubits": reader.num_qubits, "num_gates": reader.num_gates,
+              "timings": {"run": time.perf_counter() - start}}
+    if reader.measurements:
+        result["measure"] = [list(pair) for pair in reader.measurements]
+    return _state_result(result, state, shots, rng, probabilities,
+                         dense=lambda: run_qasm(path, backend="dense")[0])
+
+
+# 실행이 끝난 상태에서 확률, 샘플 등을 결과에 추가
+# 안정자 테이블은 확률 배열을 주지 않으므로, 상태 벡터에 담기는 크기이면 dense()로 같은 회로를 상태 벡터로 다시 실행
+# 확률을 뺀 이유는 notes에 기록
+def _state_result(result, state, shots, rng, probabilities, dense=None):
+    num_qubits = state.num_qubits
+    result["backend"] = type(state).__name__
+    notes = []
+    if probabilities and num_qubits > MAX_DENSE_QUBITS:
+        notes.append(f"probabilities omitted: {num_qubits} qubits exceed the dense limit of {MAX_DENSE_QUBITS}")
+    elif probabilities and isinstance(state, StabilizerState) and dense is None:
+        notes.append("probabilities omitted: the stabilizer backend has no probability vector")
+    elif probabilities:
+        start = time.perf_counter()
+        source = state
+        if isinstance(state, StabilizerState):
+            source = dense()
+            notes.append("probabilities computed by re-running the circuit on StateVector")
+        result["probabilities"] = np.asarray(source.probabilities(), dtype=np.float64)
+        result["timings"]["probabilities"] = time.perf_counter() - start
+    if notes:
+        result["notes"] = notes
+    if isinstance(state, MPSState):
+        result["truncation_error"] = state.truncation_error
+    if shots:
+        start = time.perf_counter()
+        result["samples"] = sample(state, shots, rng, bits=num_qubits > 64)
+        result["timings"]["sample"] = time.perf_counter() - start
+    return result
+
+
+# 검색 명세 실행: {"search": {"items": N, "marked": [m, ...], "iterations": t(생략하면 최적 횟수)}}
+def _run_search_spec(spec, shots, rng, probabilities):
+    if not isinstance(spec, dict) or "items" not in spec:
+        raise ValueError("search spec must be an object with 'items'")
+    num_items = int(spec["items"])
+    marked = sorted({int(m) for m in spec.get("marked", [0])})  # 중복 제거
+    if num_items < 1:
+        raise ValueError("search items must be at least 1")
+    if not marked or marked[0] < 0 or marked[-1] >= num_items:
+        raise ValueError(f"marked items must be a non-empty list within [0, {num_items})")
+    result = {"kind": "search", "num_items": num_items, "num_marked": len(marked), "timings": {}}
+
+    start = time.perf_counter()
+    if num_items <= DENSE_GROVER_LIMIT:
+        engine = GroverSearch(num_items, marked)
+        iterations = int(spec.get("iterations", engine.optimal_iterations()))
+        engine.run(iterations)
+        success = engine.success_probability()
+    else:
+        engine = ReducedGroverSearch(num_items, len(marked))
+        iterations = int(spec.get("iterations", engine.optimal_iterations()))
+        success = float(engine.success_probability(iterations))
+    result["timings"]["run"] = time.perf_counter() - start
+    result.update(backend=type(engine).__name__, iterations=iterations, success_probability=success)
+
+    if isinstance(engine, GroverSearch):
+        if probabilities:
+            result["probabilities"] = np.asarray(engine.probabilities(), dtype=np.float64)
+        if shots:
+            start = time.perf_counter()
+            result["samples"] = sample(engine, shots, rng)
+            result["timings"]["sample"] = time.perf_counter() - start
+    elif shots:
+        # 축소 엔진: 표시 항목을 뽑을지 먼저 정하고, 나머지는 표시되지 않은 항목에서 균등하게 선택
+        # (표시되지 않은 항목 중 r번째 = r + (marked[i] - i <= r인 표시 항목 수))
+        start = time.perf_counter()
+        marked_array = np.array(marked, dtype=np.uint64)
+        hits = rng.random(shots) < success
+        picked = marked_array[rng.integers(0, len(marked), shots)]
+        if num_items > len(marked):
+            ranks = rng.integers(0, num_items - len(marked), shots, dtype=np.uint64)
+            gaps = marked_array - np.arange(len(marked), dtype=np.uint64)
+            others = ranks + np.searchsorted(gaps, ranks, side="right").astype(np.uint64)
+        else:
+            others = picked
+        result["samples"] = np.where(hits, picked, others)
+        result["timings"]["sample"] = time.perf_counter() - start
+    return result
+
+
+# 명세(dict) 하나를 실행해 결과 dict 반환 (배열 값은 NumPy 배열)
+def run_spec(spec, shots=0, backend="auto", seed=None, probabilities=True):
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    rng = np.random.default_rng(seed)
+    if "search" in spec:
+        return _run_search_spec(spec["search"], shots, rng, probabilities)
+    if "qasm" in spec:
+        return _run_qasm_spec(spec["qasm"], shots, backend, rng, probabilities)
+    if "num_qubits" in spec and "gates" in spec:
+        return _run_circuit_spec(spec, shots, backend, rng, probabilities)
+    raise ValueError("spec must contain 'search', 'qasm', or 'num_qubits' and 'gates'")
+
+
+# 결과 저장: .npz는 배열을 그대로, 그 외(또는 표준 출력)는 JSON으로 저장
+def write_result(result, path=None):
+    if path is not None and path.endswith(".npz"):
+        arrays = {k: v for k, v in result.items() if isinstance(v, np.ndarray)}
+        meta = {k: v for k, v in result.items() if not isinstance(v, np.ndarray)}
+        np.savez_compressed(path, meta=json.dumps(meta), **arrays)
+        return
+    data = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in result.items()}
+    if path is None:
+        json.dump(data, sys.stdout)
+        sys.stdout.write("\n")
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+
+# 명령행 실행기: 회로 또는 검색 명세(JSON)나 OpenQASM 2.0 파일을 실행해 확률, 샘플, 시간 측정 결과를 JSON 또는 NPZ로 저장
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GUI 없이 양자 회로/그로버 검색 명세를 실행합니다.")
+    parser.add_argument("spec", help="명세 JSON 파일 ('-'이면 표준 입력) 또는 .qasm 파일")
+    parser.add_argument("--shots", type=int, default=0, help="측정 횟수 (0이면 샘플을 저장하지 않음)")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto", help="회로 명세에 쓸 시뮬레이터")
+    parser.add_argument("--seed", type=int, help="난수 시드")
+    parser.add_argument("--no-probabilities", action="store_true", help="확률 배열을 저장하지 않음")
+    parser.add_argument("-o", "--output", help="결과 파일 (.json 또는 .npz, 생략하면 표준 출력에 JSON)")
+    args = parser.parse_args(argv)
+
+    # 명세 읽기와 실행 중의 오류(파일 없음, 잘못된 JSON, 빠진 항목)는 추적 정보 없이 한 줄로 보고
+    try:
+        if args.spec.endswith(".qasm"):
+            spec = {"qasm": args.spec}
+        elif args.spec == "-":
+            spec = json.load(sys.stdin)
+        else:
+            with open(args.spec) as f:
+                spec = json.load(f)
+        result = run_spec(spec, shots=args.shots, backend=args.backend, seed=args.seed,
+                          probabilities=not args.no_probabilities)
+    except KeyError as error:
+        raise SystemExit(f"오류: spec is missing {error}") from None
+    except (OSError, ValueError) as error:
+        raise SystemExit(f"오류: {error}") from None
+    for note in result.get("notes", ()):
+        print(f"참고: {note}", file=sys.stderr)
+    write_result(result, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import queue
+
+import numpy as np
+
+from quantum_core import Job, ReducedGroverSearch, grover_distribution_job
+
+
+# 2^63 이상의 인덱스에서도 목표 항목 한 칸만 높은 확률로 표시되는지 확인
+def test_grover_distribution_near_2_64():
+    for num_items, marked in [(2 ** 63 + 10, 2 ** 63 + 5), (2 ** 64, 2 ** 64 - 1), (2 ** 64, 2 ** 63 - 1)]:
+        first = (marked // 100) * 100
+        count = min(100, num_items - first)
+        iterations, probs, success = grover_distribution_job(Job(queue.Queue()), num_items, marked, first, count)
+        marked_prob, unmarked_prob = ReducedGroverSearch(num_items).item_probabilities(iterations)
+        expected = np.full(count, unmarked_prob)
+        expected[marked - first] = marked_prob
+        assert probs.shape == (count,)
+        np.testing.assert_array_equal(probs, expected)
+        assert success > 0.99
+
+    # 표시 구간 밖의 목표 항목은 어느 칸에도 나타나지 않음
+    _, probs, _ = grover_distribution_job(Job(queue.Queue()), 2 ** 64, 2 ** 63 + 5, 0, 100)
+    assert np.all(probs < 1e-9)